@@ -0,0 +1,71 @@
+import asyncio
+import threading
+from collections import deque
+import redis.asyncio
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialBackoff
+
+class AsyncEngine: # redis.asyncio client on a private event loop thread, so independent round trips can overlap
+    def __init__(self, host, port, username, password, options, metrics):
+        self.metrics = metrics
+        self.concurrency = options["async_concurrency"]  # round trips in flight at once
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.pool = redis.asyncio.BlockingConnectionPool(
+            host=host,
+            port=port,
+            username=username,
+            password=password,
+            db=options["db"],
+            decode_responses=True,
+            max_connections=2 * self.concurrency,  # a watched write holds its WATCH connection while it borrows one for the read
+            timeout=options["pool_timeout"],
+            socket_timeout=options["socket_timeout"],
+            socket_connect_timeout=options["socket_connect_timeout"],
+            socket_keepalive=True,
+            health_check_interval=options["health_check_interval"],
+            retry=Retry(ExponentialBackoff(cap=options["backoff_cap"], base=options["backoff_base"]), options["retries"]),
+            retry_on_error=[redis.ConnectionError, redis.TimeoutError]
+        )
+        self.client = redis.asyncio.Redis(connection_pool=self.pool)
+        try:
+            self.run(self.client.ping())
+        except BaseException:
+            self.close()
+            raise
+
+    def run(self, coroutine): # runs a coroutine on the loop and waits for its result on the calling thread
+        return self.submit(coroutine).result()
+
+    def submit(self, coroutine): # schedules a coroutine on the loop, returning a concurrent.futures.Future
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def map_ordered(self, fn, items): # yields fn(item) results in order while keeping up to `concurrency` coroutines in flight
+        pending = deque()
+        try:
+            for item in items:
+                pending.append(self.submit(fn(item)))
+                if len(pending) >= self.concurrency:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:  # the consumer stopped early or a page failed
+                future.cancel()
+
+    async def execute(self, pipe, name): # runs a queued pipeline, counted like the instrumented sync client
+        self.metrics.count_commands(len(pipe.command_stack))
+        self.metrics.count_traffic(round_trips=1)
+        with self.metrics.timed("commands", f"ASYNC {name}"):
+            return await pipe.execute()
+
+    def close(self):
+        if self.loop.is_running():
+            try:
+                self.run(self.pool.disconnect())
+            except (redis.RedisError, OSError):
+                pass
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+        self.loop.close()
@@ -0,0 +1,246 @@
+"""Benchmarks the Redis data paths behind every main window action.
+
+Runs send/update/delete/query/search/range search/scan search/import/export at several dataset sizes against a local
+redis-server (--host/--port) or an in-process fakeredis TCP server (--fakeredis) and prints JSON:
+
+    python src/benchmark.py --fakeredis --sizes 1000 100000
+    python src/benchmark.py --port 6379 --db 15 --flush --output bench.json
+    python src/benchmark.py --cluster --port 7000 --flush --sizes 1000 100000
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import redis
+from cluster_repository import ClusterPersonRepository, SHARD_COUNT_KEY
+from person_repository import PersonRepository, read_people_csv, write_people_csv, COLUMNS, FIELDS, RECORD_FORMATS, VERSION_FIELD
+
+DEPARTMENTS = ["Executive", "Human Resources", "Engineering", "Sales", "Marketing", "Finance", "IT", "Operations"]
+FIRST_NAMES = ["James", "Mary", "Robert", "Patricia", "John", "Jennifer", "Michael", "Linda", "David", "Elizabeth",
+               "William", "Barbara", "Richard", "Susan", "Joseph", "Jessica", "Thomas", "Sarah", "Charles", "Karen"]
+LAST_NAMES = ["Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis", "Rodriguez", "Martinez",
+              "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas", "Taylor", "Moore", "Jackson", "Martin"]
+
+def synthetic_person(rng, index):
+    return {
+        "_id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "First Name": rng.choice(FIRST_NAMES) + str(index % 97),
+        "Middle Name": rng.choice(FIRST_NAMES),
+        "Last Name": rng.choice(LAST_NAMES),
+        "Age": str(rng.randint(18, 70)),
+        "Title": rng.choice(["Engineer", "Manager", "Analyst", "Director", "Clerk"]),
+        "Join Date": f"{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}-{rng.randint(2000, 2025)}",
+        "Department": rng.choice(DEPARTMENTS),
+        "Address 1": f"{rng.randint(1, 9999)} Main St",
+        "Address 2": "",
+        "Country": rng.choice(["US", "UK", "DE", "FR", "CA"]),
+        "Misc": "",
+    }
+
+def write_synthetic_csv(path, size, rng):
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(COLUMNS)
+        for index in range(size):
+            person_data = synthetic_person(rng, index)
+            writer.writerow([person_data[field] for field in FIELDS])
+
+def peak_rss_kb(): # peak resident set size of this process, None where it can't be read
+    try:
+        import resource
+    except ImportError:  # Windows
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset // 1024
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # bytes on macOS, KiB elsewhere
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+class Benchmark: # times repeated calls of one operation and collects its report
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.results = {}
+
+    def measure(self, name, calls, records_per_call=1): # calls is an iterable of zero-argument functions
+        latencies = []
+        round_trips = self.metrics.round_trips
+        start = time.perf_counter()
+        for call in calls:
+            call_start = time.perf_counter()
+            call()
+            latencies.append(time.perf_counter() - call_start)
+        seconds = time.perf_counter() - start
+        round_trips = self.metrics.round_trips - round_trips
+
+        latencies.sort()
+        records = len(latencies) * records_per_call
+        self.results[name] = {
+            "calls": len(latencies),
+            "records": records,
+            "seconds": round(seconds, 6),
+            "records_per_second": round(records / seconds, 1) if seconds else None,
+            "round_trips": round_trips,
+            "round_trips_per_call": round(round_trips / len(latencies), 2) if latencies else None,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 0.50) * 1000, 3) if latencies else None,
+                "p90": round(percentile(latencies, 0.90) * 1000, 3) if latencies else None,
+                "p99": round(percentile(latencies, 0.99) * 1000, 3) if latencies else None,
+                "max": round(latencies[-1] * 1000, 3) if latencies else None,
+            },
+            "peak_rss_kb": peak_rss_kb(),
+        }
+        print(f"  {name}: {records} records in {seconds:.2f}s, {round_trips} round trips", file=sys.stderr)
+
+def run_size(repository, size, args, workdir): # one full pass over every data path at a dataset size
+    rng = random.Random(args.seed + size)
+    client = repository.get_client()
+    client.flushdb()
+    if isinstance(repository, ClusterPersonRepository):
+        client.set(SHARD_COUNT_KEY, len(repository.shards))  # flushed with the rest, the shard layout must survive for other clients
+    bench = Benchmark(repository.metrics)
+
+    # import: the chunked MULTI/EXEC path used by Import CSV
+    csv_path = os.path.join(workdir, f"people_{size}.csv")
+    write_synthetic_csv(csv_path, size, rng)
+
+    def import_all():
+        with open(csv_path, 'r', newline='') as file:
+            for chunk in repository.put_stream(read_people_csv(file)):
+                pass
+    bench.measure("import", [import_all], size)
+    bench.results["import"]["memory"] = repository.record_bytes()
+
+    bench.measure("rebuild_search_index", [lambda: sum(1 for _ in repository.rebuild_search_index())], size)
+
+    # query: a full streaming load, as after connecting or pressing Query
+    bench.measure("query", [lambda: sum(len(records) for records, stats in repository.iter_all())] * args.repeat, size)
+
+    # search: index lookup plus a fetch of the hits
+    def search(text):
+        for records, stats in repository.search(text, ""):
+            pass
+    queries = [rng.choice(FIRST_NAMES)[:rng.randint(3, 5)].lower() for _ in range(args.searches)]
+    bench.measure("search", [lambda text=text: search(text) for text in queries])
+
+    # range search: Age and Join Date sorted-set lookups plus a fetch of the hits
+    def range_search(low):
+        for records, stats in repository.search("", "", ranges={"Age": (low, low + 2)}):
+            pass
+    bench.measure("range_search", [lambda low=rng.randint(18, 68): range_search(low) for _ in range(args.searches)])
+
+    # scan search: two letters are too short for trigrams, so every record is checked, in Lua unless --client-filter
+    scans = [rng.choice(FIRST_NAMES)[:2].lower() for _ in range(args.scans)]
+    bench.measure("scan_search", [lambda text=text: search(text) for text in scans])
+
+    # export: SSCAN plus pipelined fetches straight to disk
+    export_path = os.path.join(workdir, f"export_{size}.csv")
+
+    def export():
+        with open(export_path, 'w', newline='') as file:
+            for rows in write_people_csv(file, (records for records, stats in repository.iter_all(dedupe=False))):
+                pass
+    bench.measure("export", [export], size)
+
+    # send: one new person per call, like the Send button
+    bench.measure("send", [lambda: repository.put_many([synthetic_person(rng, size)], new=True) for _ in range(args.single_ops)])
+
+    # update/delete: batches of selected rows, like the Update and Delete buttons; an update writes the edited field over the loaded version
+    sample = repository.random_ids(args.single_ops)
+    batches = [sample[i:i + args.selection] for i in range(0, len(sample), args.selection)]
+
+    def update(batch):
+        records, stats = repository.get_many(batch)
+        repository.put_fields({person_data["_id"]: {"Title": "Updated"} for person_data in records},
+                              {person_data["_id"]: person_data.get(VERSION_FIELD, "0") for person_data in records})
+    bench.measure("update", [lambda batch=batch: update(batch) for batch in batches], args.selection)
+    bench.measure("delete", [lambda batch=batch: repository.delete_many(batch) for batch in batches], args.selection)
+
+    os.remove(csv_path)
+    os.remove(export_path)
+    return bench.results
+
+def start_fakeredis(): # runs a fakeredis TCP server on a free local port, returns the port
+    try:
+        from fakeredis import TcpFakeServer
+    except ImportError:
+        sys.exit("--fakeredis needs the fakeredis package: pip install fakeredis")
+    server = TcpFakeServer(("127.0.0.1", 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address[1]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Redis data paths of the Redis frontend")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--user", default="")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--db", type=int, default=15, help="database to benchmark in, it is flushed for every size")
+    parser.add_argument("--flush", action="store_true", help="allow flushing a database that already holds keys")
+    parser.add_argument("--fakeredis", action="store_true", help="benchmark an in-process fakeredis TCP server instead")
+    parser.add_argument("--cluster", action="store_true", help="--host/--port is a node of a Redis Cluster, every shard is read and written in parallel")
+    parser.add_argument("--shards", type=int, default=PersonRepository.DEFAULT_CONNECTION_OPTIONS["cluster_shards"], help="hash-tagged shards for --cluster")
+    parser.add_argument("--async-engine", action="store_true", help="overlap batch round trips with the asyncio engine")
+    parser.add_argument("--record-format", choices=RECORD_FORMATS, default=PersonRepository.DEFAULT_RECORD_FORMAT)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--batch-size", type=int, default=PersonRepository.DEFAULT_BATCH_SIZE)
+    parser.add_argument("--repeat", type=int, default=3, help="full queries per size")
+    parser.add_argument("--searches", type=int, default=50, help="name searches per size")
+    parser.add_argument("--scans", type=int, default=3, help="unindexed searches per size, each reads every record")
+    parser.add_argument("--client-filter", action="store_true", help="filter unindexed searches in Python instead of Lua")
+    parser.add_argument("--single-ops", type=int, default=1000, help="sends, and rows updated/deleted, per size")
+    parser.add_argument("--selection", type=int, default=100, help="rows per update/delete call")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    if args.cluster and (args.fakeredis or args.async_engine):
+        sys.exit("--cluster needs a real cluster and reads the shards in parallel without --async-engine")
+    port = start_fakeredis() if args.fakeredis else args.port
+    repository_class = ClusterPersonRepository if args.cluster else PersonRepository
+    repository = repository_class(args.host, port, args.user, args.password, batch_size=args.batch_size, connection_options={"db": args.db, "cluster_shards": args.shards},
+                                  async_engine=args.async_engine, record_format=args.record_format)
+    repository.scan_filter = not args.client_filter
+    if repository.get_client().dbsize() > (1 if args.cluster else 0) and not args.flush:  # a cluster holds the shard count
+        sys.exit(f"Database {args.db} is not empty, pass --flush to let the benchmark clear it")
+
+    report = {
+        "backend": "fakeredis" if args.fakeredis else f"redis-cluster://{args.host}:{port}" if args.cluster else f"redis://{args.host}:{port}/{args.db}",
+        "cluster_shards": len(repository.shards) if args.cluster else None,
+        "batch_size": args.batch_size,
+        "async_engine": args.async_engine,
+        "scan_filter": repository.scan_filter,
+        "record_format": args.record_format,
+        "python": sys.version.split()[0],
+        "redis_py": redis.__version__,
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "sizes": {},
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            print(f"size {size}", file=sys.stderr)
+            report["sizes"][str(size)] = run_size(repository, size, args, workdir)
+
+    repository.get_client().flushdb()
+    repository.close()
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
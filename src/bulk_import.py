@@ -0,0 +1,116 @@
+import csv
+import io
+import locale
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from person_repository import CsvFormatError, check_csv_headers, person_from_row
+
+IMPORT_CHUNK_BYTES = 8 * 1024 * 1024  # bytes of CSV one parser process handles per task
+DEFAULT_WRITERS = 4  # Redis connections writing batches at once
+
+def plan_ranges(filename, chunk_bytes=IMPORT_CHUNK_BYTES): # returns the header and the (start, end) byte ranges of a CSV file, each starting on a line
+    with open(filename, 'r', newline='') as file:
+        fieldnames = next(csv.reader([file.readline()]), None)
+    check_csv_headers(fieldnames)
+
+    ranges = []
+    with open(filename, 'rb') as file:
+        file.readline()  # the header
+        start = file.tell()
+        size = os.fstat(file.fileno()).st_size
+        while start < size:
+            file.seek(min(start + chunk_bytes, size))
+            file.readline()  # on to the start of the next line
+            end = min(file.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return fieldnames, ranges
+
+def parse_range(filename, fieldnames, start, end): # runs in a parser process, returns the person hashes in a byte range
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        text = file.read(end - start).decode(locale.getpreferredencoding(False))  # the encoding open() uses for the header
+
+    records = []
+    for row in csv.reader(io.StringIO(text, newline='')):
+        if not row:
+            continue
+        if len(row) != len(fieldnames):
+            # A quoted field spanning lines can't be split by byte offset, import such a file on its own
+            raise CsvFormatError(f"row {len(records) + 1} after byte {start} has {len(row)} fields, the header has {len(fieldnames)}")
+        records.append(person_from_row(dict(zip(fieldnames, row))))
+    return records
+
+class ParallelImport: # imports many CSV files: a process pool parses byte ranges while several Redis connections write the batches
+    def __init__(self, repository, filenames, processes=None, writers=DEFAULT_WRITERS, chunk_bytes=IMPORT_CHUNK_BYTES):
+        self.repository = repository
+        self.filenames = list(filenames)
+        self.processes = processes or os.cpu_count() or 1
+        self.writers = writers
+        self.chunk_bytes = chunk_bytes
+        self.files = {filename: {"bytes": os.path.getsize(filename), "parsed_bytes": 0, "rows": 0, "error": None} for filename in self.filenames}
+        self.total_bytes = sum(file["bytes"] for file in self.files.values())
+        self.imported = 0
+
+    def run(self): # yields a progress report after every written batch, stops cleanly when the caller stops iterating
+        tasks = []
+        for filename in self.filenames:
+            try:
+                fieldnames, ranges = plan_ranges(filename, self.chunk_bytes)
+            except (CsvFormatError, OSError, UnicodeDecodeError) as e:
+                self._failed(filename, e)
+                continue
+            tasks.extend((filename, fieldnames, start, end) for start, end in ranges)
+            self.files[filename]["parsed_bytes"] = ranges[0][0] if ranges else self.files[filename]["bytes"]  # the header counts as done
+
+        # spawn, not fork: a forked copy of the GUI process could inherit locks held by its other threads
+        with ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context("spawn")) as executor:
+            written = self.repository.put_stream(self._parsed_records(executor, tasks), writers=self.writers)
+            try:
+                for chunk in written:
+                    self.imported += len(chunk)
+                    yield self.progress()
+            finally:
+                written.close()  # waits for the batches being written
+                executor.shutdown(cancel_futures=True)
+        yield self.progress()
+
+    def _parsed_records(self, executor, tasks): # person hashes in file order, with up to two ranges per process parsed ahead
+        pending = deque()
+        tasks = iter(tasks)
+        for task in tasks:
+            pending.append((task, executor.submit(parse_range, *task)))
+            if len(pending) >= 2 * self.processes:
+                break
+        while pending:
+            (filename, fieldnames, start, end), future = pending.popleft()
+            next_task = next(tasks, None)
+            if next_task is not None:
+                pending.append((next_task, executor.submit(parse_range, *next_task)))
+
+            file = self.files[filename]
+            if file["error"] is not None:
+                continue  # an earlier range of this file already failed
+            try:
+                records = future.result()
+            except (CsvFormatError, OSError, UnicodeDecodeError) as e:
+                self._failed(filename, e)
+                continue
+            file["parsed_bytes"] += end - start
+            file["rows"] += len(records)
+            yield from records
+
+    def _failed(self, filename, error):
+        file = self.files[filename]
+        file["error"] = str(error)
+        file["parsed_bytes"] = file["bytes"]  # nothing more to do for it
+
+    def progress(self):
+        return {
+            "done": sum(file["parsed_bytes"] for file in self.files.values()),
+            "total": self.total_bytes,
+            "imported": self.imported,
+            "files": {filename: dict(file) for filename, file in self.files.items()},
+        }
@@ -0,0 +1,370 @@
+import heapq
+import itertools
+import queue
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+import redis
+from redis.backoff import ExponentialBackoff
+from redis.cluster import RedisCluster
+from redis.exceptions import RedisClusterException
+from redis.retry import Retry
+from instrumentation import Metrics, InstrumentedRedisCluster
+from person_repository import PersonRepository, chunked, stamp_versions, LIVE_BLOCK_MS, LIVE_DEBOUNCE_SECONDS, RECORD_BYTES_SAMPLE
+
+SHARD_COUNT_KEY = "person_shards"  # number of shards the people are spread over, fixed by the first client that connects to a cluster
+PAGE_BOUNDARIES_KEPT = 256  # merged order index positions whose per-shard offsets ordered_page remembers
+FAN_OUT_QUEUE_PER_SHARD = 2  # pages a shard reads ahead of the caller in search, iter_all and the other fanned-out walks
+
+def shard_prefix(index): # key prefix of a shard, the hash tag puts every key of the shard in the same cluster slot
+    return f"{{{index}}}:"
+
+def shard_index(person_id, shards): # the shard a person lives in, stable for as long as the shard count is
+    return zlib.crc32(person_id.encode()) % shards
+
+def merge_stats(latest, start): # sums the running stats of every shard that has reported, wall clock seconds since start
+    merged = {}
+    for stats in latest:
+        for name, value in (stats or {}).items():
+            if isinstance(value, bool):
+                merged[name] = merged.get(name, True) and value  # "indexed" only if every shard used its index
+            else:
+                merged[name] = merged.get(name, 0) + value
+    merged["seconds"] = time.perf_counter() - start
+    return merged
+
+class ClusterPersonRepository: # PersonRepository for Redis Cluster: people are spread over hash-tagged shards, reads fan out to every shard in parallel
+    # Each shard is a PersonRepository whose keys all start with "{n}:", so its MULTI/EXEC batches, WATCH, index
+    # intersections and Lua scripts stay within one slot. A person's shard follows from the id alone.
+
+    def __init__(self, redis_url, redis_port, redis_user, redis_password, batch_size=PersonRepository.DEFAULT_BATCH_SIZE, cache_size=PersonRepository.DEFAULT_CACHE_SIZE,
+                 connection_options=None, metrics=None, async_engine=False, record_format=PersonRepository.DEFAULT_RECORD_FORMAT):
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.engine = None  # the async engine needs a single server, the fan-out threads overlap the shards' round trips instead
+        self.cache = None  # invalidation messages arrive per node, the record cache stays off in cluster mode
+        self.cache_mode = None
+        self.lock = threading.Lock()
+        self.page_boundaries = {}  # merged order index position -> offset into each shard's order index
+        options = dict(PersonRepository.DEFAULT_CONNECTION_OPTIONS, **(connection_options or {}))
+        try:
+            self.client = InstrumentedRedisCluster(
+                self.metrics,
+                url=f"redis://{redis_url}:{int(redis_port)}",  # only a cluster made from a URL hands connection_class on to its node pools
+                username=redis_user or None,
+                password=redis_password or None,
+                decode_responses=True,
+                socket_timeout=options["socket_timeout"],
+                socket_connect_timeout=options["socket_connect_timeout"],
+                socket_keepalive=True,
+                retry=Retry(ExponentialBackoff(cap=options["backoff_cap"], base=options["backoff_base"]), options["retries"])
+            )
+            self.client.set(SHARD_COUNT_KEY, options["cluster_shards"], nx=True)
+            shard_count = int(self.client.get(SHARD_COUNT_KEY))  # the stored count wins, the people are already spread by it
+            self.connected = True
+        except (redis.ConnectionError, redis.TimeoutError, RedisClusterException, ValueError) as e:
+            self.connected = False
+            raise redis.ConnectionError(f"Connection failed: {str(e)}")
+
+        self.shards = [PersonRepository(redis_url, redis_port, redis_user, redis_password, batch_size=batch_size, connection_options=options, metrics=self.metrics,
+                                        record_format=record_format, client=self.client, key_prefix=shard_prefix(index)) for index in range(shard_count)]
+        self.executor = ThreadPoolExecutor(shard_count, thread_name_prefix="shard")  # short per-shard calls, the walks get threads of their own
+
+    @property
+    def batch_size(self):
+        return self.shards[0].batch_size
+
+    @batch_size.setter
+    def batch_size(self, batch_size):
+        for shard in self.shards:
+            shard.batch_size = batch_size
+
+    @property
+    def record_format(self):
+        return self.shards[0].record_format
+
+    @record_format.setter
+    def record_format(self, record_format):
+        for shard in self.shards:
+            shard.record_format = record_format
+
+    @property
+    def scan_filter(self): # off once any shard found that the server refuses scripts
+        return all(shard.scan_filter for shard in self.shards)
+
+    @scan_filter.setter
+    def scan_filter(self, enabled):
+        for shard in self.shards:
+            shard.scan_filter = enabled
+
+    def configure_async(self, enabled):
+        if enabled:
+            raise redis.RedisError("The async engine needs a single server, cluster mode reads and writes the shards in parallel already")
+
+    def configure_cache(self, cache_size): # the record cache stays off, see __init__
+        pass
+
+    def cache_stats(self):
+        return None
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.client.close()
+
+    def get_client(self):
+        return self.client
+
+    def server_command_stats(self): # INFO commandstats of every node, empty when the cluster won't report it
+        try:
+            return self.client.info("commandstats", target_nodes=RedisCluster.ALL_NODES)
+        except redis.RedisError:
+            return {}
+
+    def check_connection(self):
+        try:
+            self.client.ping()
+            self.connected = True
+            return True
+        except (redis.ConnectionError, RedisClusterException):
+            self.connected = False
+            return False
+
+    def shard_for(self, person_id):
+        return self.shards[shard_index(person_id, len(self.shards))]
+
+    def _group(self, items, person_id=lambda item: item): # {shard: items} in the given order, for the shards that have any
+        groups = {}
+        for item in items:
+            groups.setdefault(self.shard_for(person_id(item)), []).append(item)
+        return groups
+
+    def _map(self, fn, *iterables): # fn over the shards (and any per-shard arguments) in parallel, results in shard order
+        return list(self.executor.map(fn, *(iterables or (self.shards,))))
+
+    def _fan_out(self, generators): # runs one generator per shard on a thread of its own, yielding (shard index, item) as items arrive
+        items = queue.Queue(FAN_OUT_QUEUE_PER_SHARD * len(generators))  # a shard that gets this far ahead waits for the caller
+        stop = threading.Event()
+
+        def offer(entry):
+            while not stop.is_set():
+                try:
+                    items.put(entry, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def run(index, generator):
+            error = None
+            try:
+                for item in generator:
+                    if not offer((index, item, False, None)):
+                        break
+            except Exception as e:
+                error = e
+            finally:
+                generator.close()
+                offer((index, None, True, error))
+
+        threads = [threading.Thread(target=run, args=(index, generator), daemon=True) for index, generator in enumerate(generators)]
+        for thread in threads:
+            thread.start()
+        running = len(threads)
+        try:
+            while running:
+                index, item, done, error = items.get()
+                if error is not None:
+                    raise error
+                if done:
+                    running -= 1
+                else:
+                    yield index, item
+        finally:
+            stop.set()  # the caller stopped iterating or a shard failed, the others stop after their current round trip
+            for thread in threads:
+                thread.join()
+
+    def query_people(self): # every person record plus round trip and timing stats, one SMEMBERS and fetch per shard in parallel
+        start = time.perf_counter()
+        results = self._map(lambda shard: shard.query_people())
+        records = [person_data for shard_records, stats in results for person_data in shard_records]
+        return records, {"records": len(records), "round_trips": sum(stats["round_trips"] for shard_records, stats in results), "seconds": time.perf_counter() - start}
+
+    def get_many(self, person_ids, batch_size=None): # fetches every shard's share of the ids in parallel, records in the order asked for
+        person_ids = list(person_ids)
+        start = time.perf_counter()
+        groups = self._group(person_ids)
+        found = {}
+        round_trips = 0
+        for records, stats in self._map(lambda shard: shard.get_many(groups[shard], batch_size), groups):
+            found.update((person_data["_id"], person_data) for person_data in records)
+            round_trips += stats["round_trips"]
+        records = [found[person_id] for person_id in person_ids]
+        return records, {"records": len(records), "round_trips": round_trips, "seconds": time.perf_counter() - start}
+
+    def count(self): # one SCARD per shard, grouped into a pipeline per node
+        pipe = self.client.pipeline(transaction=False)
+        for shard in self.shards:
+            pipe.scard(shard.ids_key)
+        return sum(pipe.execute())
+
+    def random_ids(self, count):
+        person_ids = [person_id for shard_ids in self._map(lambda shard: shard.random_ids(count)) for person_id in shard_ids]
+        return random.sample(person_ids, min(count, len(person_ids)))
+
+    def put_many(self, records, new=False, transaction=False, logged=True): # each shard writes its share, a transaction is atomic per shard, returns {id: stored version}
+        groups = self._group(records, lambda person_data: person_data["_id"])
+        versions = {}
+        for shard_versions in self._map(lambda shard: shard.put_many(groups[shard], new, transaction, logged), groups):
+            versions.update(shard_versions)
+        return versions
+
+    def put_stream(self, records, batch_size=None, writers=1): # takes a batch per shard at a time and writes the shards' batches in parallel, yielding each chunk once written
+        # The shards already write side by side, so writers isn't needed here; like PersonRepository.put_stream, one "reload" entry ends the import
+        written = False
+        try:
+            for chunk in chunked(records, (batch_size or self.batch_size) * len(self.shards)):
+                written = True
+                yield stamp_versions(chunk, self.put_many(chunk, transaction=True, logged=False))
+        finally:
+            if written:
+                self.log_reload()
+
+    def log_reload(self): # a reload entry in every shard's change log
+        self._map(lambda shard: shard.log_reload())
+
+    def put_fields(self, changes, versions=None): # PersonRepository.put_fields on every shard holding one of the people
+        groups = self._group(changes)
+        result = {"versions": {}, "conflicts": [], "missing": []}
+        for saved in self._map(lambda shard: shard.put_fields({person_id: changes[person_id] for person_id in groups[shard]}, versions), groups):
+            result["versions"].update(saved["versions"])
+            result["conflicts"].extend(saved["conflicts"])
+            result["missing"].extend(saved["missing"])
+        return result
+
+    def delete_many(self, person_ids, batch_size=None):
+        groups = self._group(person_ids)
+        self._map(lambda shard: shard.delete_many(groups[shard], batch_size), groups)
+
+    def delete_matching(self, firstname, lastname, ranges=None, facets=None, batch_size=None): # every shard deletes its matches in parallel, yielding the summed (deleted, checked, candidates)
+        latest = [(0, 0, 0)] * len(self.shards)
+        for index, progress in self._fan_out([shard.delete_matching(firstname, lastname, ranges, facets, batch_size) for shard in self.shards]):
+            latest[index] = progress
+            yield tuple(map(sum, zip(*latest)))
+
+    def change_cursor(self): # one change log cursor per shard
+        return tuple(self._map(lambda shard: shard.change_cursor()))
+
+    def changes_since(self, cursor): # reads every shard's change log in parallel, trimmed in any of them means reload
+        results = self._map(lambda shard, shard_cursor: shard.changes_since(shard_cursor), self.shards, cursor)
+        if any(changes["truncated"] for changes in results):
+            return {"cursor": self.change_cursor(), "truncated": True, "records": [], "deleted": [], "entries": 0}
+        return {
+            "cursor": tuple(changes["cursor"] for changes in results),
+            "truncated": False,
+            "records": [person_data for changes in results for person_data in changes["records"]],
+            "deleted": [person_id for changes in results for person_id in changes["deleted"]],
+            "entries": sum(changes["entries"] for changes in results),
+        }
+
+    def follow_changes(self, cursor, stopped): # polls the shards' change logs every LIVE_BLOCK_MS, a blocking XREAD can only wait on one slot
+        changes = self.changes_since(cursor)
+        yield changes
+        while not changes["truncated"]:
+            deadline = time.monotonic() + LIVE_BLOCK_MS / 1000
+            while time.monotonic() < deadline:
+                if stopped():
+                    return
+                time.sleep(LIVE_DEBOUNCE_SECONDS)
+            changes = self.changes_since(changes["cursor"])
+            if changes["entries"] or changes["truncated"]:
+                yield changes
+
+    def migrate_records(self, batch_size=None): # every shard converts its people in parallel, yielding the number checked so far
+        latest = [0] * len(self.shards)
+        for index, checked in self._fan_out([shard.migrate_records(batch_size) for shard in self.shards]):
+            latest[index] = checked
+            yield sum(latest)
+
+    def record_bytes(self, sample_size=RECORD_BYTES_SAMPLE): # the shards' samples averaged together
+        samples = [sample for sample in self._map(lambda shard: shard.record_bytes(max(1, sample_size // len(self.shards)))) if sample]
+        if not samples:
+            return None
+        sampled = sum(sample["sample"] for sample in samples)
+        return {"bytes_per_record": round(sum(sample["bytes_per_record"] * sample["sample"] for sample in samples) / sampled, 1), "sample": sampled,
+                "estimated": any(sample["estimated"] for sample in samples)}
+
+    def search_ids(self, firstname, lastname, ranges=None, facets=None): # the union of every shard's index hits, None when any shard's index can't answer
+        id_sets = self._map(lambda shard: shard.search_ids(firstname, lastname, ranges, facets))
+        if any(person_ids is None for person_ids in id_sets):
+            return None
+        return set().union(*id_sets)
+
+    def search(self, firstname, lastname, batch_size=None, ranges=None, facets=None): # every shard searches in parallel, yielding (matching records, summed stats) as pages arrive
+        start = time.perf_counter()
+        latest = [None] * len(self.shards)
+        for index, (records, stats) in self._fan_out([shard.search(firstname, lastname, batch_size, ranges, facets) for shard in self.shards]):
+            latest[index] = dict(stats)
+            yield records, merge_stats(latest, start)
+
+    def facet_counts(self, selected=None): # every shard's counts summed, None until every shard's index is built
+        shard_counts = self._map(lambda shard: shard.facet_counts(selected))
+        if any(counts is None for counts in shard_counts):
+            return None
+        totals = {}
+        for counts in shard_counts:
+            for field, values in counts.items():
+                for value, count in values.items():
+                    totals.setdefault(field, {})[value] = totals.get(field, {}).get(value, 0) + count
+        return totals
+
+    def rebuild_search_index(self): # every shard rebuilds its own indexes in parallel, yielding the number indexed so far
+        latest = [0] * len(self.shards)
+        for index, indexed in self._fan_out([shard.rebuild_search_index() for shard in self.shards]):
+            latest[index] = indexed
+            yield sum(latest)
+
+    def ordered_count(self): # people in every shard's order index, None until each is built; starts a new scroll through ordered_page
+        totals = self._map(lambda shard: shard.ordered_count())
+        with self.lock:
+            self.page_boundaries.clear()
+        if any(total is None for total in totals):
+            return None
+        return sum(totals)
+
+    def ordered_page(self, start, count): # positions start..start+count-1 of the shards' order indexes merged by (score, id), oldest first
+        # A shard's share of the earlier positions isn't known up front: the merge resumes from the nearest page boundary
+        # seen before, so scrolling reads about a page per shard and only a jump reads every entry it skips
+        with self.lock:
+            position, offsets = max(((position, offsets) for position, offsets in self.page_boundaries.items() if position <= start),
+                                    default=(0, (0,) * len(self.shards)))
+        wanted = start + count - position
+        pipe = self.client.pipeline(transaction=False)
+        for shard, offset in zip(self.shards, offsets):
+            pipe.zrange(shard.order_key, offset, offset + wanted - 1, withscores=True)
+        merged = heapq.merge(*([(score, person_id, index) for person_id, score in entries] for index, entries in enumerate(pipe.execute())))
+        taken = list(itertools.islice(merged, wanted))
+
+        skipped = start - position
+        at_start = list(offsets)
+        for score, person_id, index in taken[:skipped]:
+            at_start[index] += 1
+        at_end = list(at_start)
+        for score, person_id, index in taken[skipped:]:
+            at_end[index] += 1
+        with self.lock:
+            if len(self.page_boundaries) >= PAGE_BOUNDARIES_KEPT:
+                self.page_boundaries.clear()
+            self.page_boundaries[start] = tuple(at_start)
+            self.page_boundaries[start + len(taken) - skipped] = tuple(at_end)
+
+        records, stats = self.get_many([person_id for score, person_id, index in taken[skipped:]])
+        return records
+
+    def iter_all(self, batch_size=None, dedupe=True): # every shard walks its person_ids in parallel, yielding (records, summed stats) as batches arrive
+        start = time.perf_counter()
+        latest = [None] * len(self.shards)
+        for index, (records, stats) in self._fan_out([shard.iter_all(batch_size, dedupe) for shard in self.shards]):
+            latest[index] = dict(stats)
+            yield records, merge_stats(latest, start)
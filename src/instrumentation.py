@@ -0,0 +1,211 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+import redis
+import redis.cluster
+
+LATENCY_BUCKETS_MS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]  # upper bounds, the last bucket is open-ended
+
+class LatencyHistogram: # fixed log-spaced buckets, cheap enough to update on every command
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms):
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, fraction): # upper bound of the bucket holding the given fraction of samples
+        if not self.count:
+            return None
+        wanted = fraction * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= wanted:
+                return round(min(bound, self.max_ms), 3)
+        return round(self.max_ms, 3)
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else None,
+            "p50_ms": self.percentile(0.50),
+            "p90_ms": self.percentile(0.90),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": round(self.max_ms, 3),
+            "buckets": {f"<={bound}": count for bound, count in zip(LATENCY_BUCKETS_MS + ["inf"], self.buckets) if count},
+        }
+
+class Metrics: # latency histograms per Redis command, per user action and per table update, plus traffic counters
+    CATEGORIES = ("commands", "actions", "table")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {category: {} for category in self.CATEGORIES}
+            self.commands_sent = 0  # commands sent, including every command queued in a pipeline
+            self.round_trips = 0  # packets written: one per command or pipeline
+            self.bytes_out = 0
+            self.bytes_in = 0
+            self.started = time.time()
+
+    def record(self, category, name, seconds):
+        with self.lock:
+            histogram = self.histograms[category].get(name)
+            if histogram is None:
+                histogram = self.histograms[category][name] = LatencyHistogram()
+            histogram.add(seconds * 1000)
+
+    @contextmanager
+    def timed(self, category, name): # records the time spent in the with block, even if it raises
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(category, name, time.perf_counter() - start)
+
+    def count_commands(self, commands):
+        with self.lock:
+            self.commands_sent += commands
+
+    def count_traffic(self, bytes_out=0, bytes_in=0, round_trips=0):
+        with self.lock:
+            self.bytes_out += bytes_out
+            self.bytes_in += bytes_in
+            self.round_trips += round_trips
+
+    def summary(self): # one line for the status bar
+        with self.lock:
+            latencies = LatencyHistogram()
+            for histogram in self.histograms["commands"].values():
+                latencies.count += histogram.count
+                latencies.max_ms = max(latencies.max_ms, histogram.max_ms)
+                latencies.buckets = [a + b for a, b in zip(latencies.buckets, histogram.buckets)]
+            p50, p99 = latencies.percentile(0.50), latencies.percentile(0.99)
+            text = f"{self.commands_sent} cmds / {self.round_trips} round trips"
+            if p50 is not None:
+                text += f", p50 {p50:g} ms, p99 {p99:g} ms"
+            return text + f", out {format_bytes(self.bytes_out)}, in {format_bytes(self.bytes_in)}"
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                "since": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(self.started)),
+                "seconds": round(time.time() - self.started, 3),
+                "commands_sent": self.commands_sent,
+                "round_trips": self.round_trips,
+                "bytes_out": self.bytes_out,
+                "bytes_in": self.bytes_in,
+                **{category: {name: histogram.to_dict() for name, histogram in sorted(histograms.items())}
+                   for category, histograms in self.histograms.items()},
+            }
+
+def format_bytes(count):
+    for unit in ("B", "KB", "MB"):
+        if count < 1024:
+            return f"{count:.0f} {unit}"
+        count /= 1024
+    return f"{count:.1f} GB"
+
+class CountingSocket: # socket proxy that counts the bytes a connection sends and receives
+    def __init__(self, sock, metrics):
+        self._sock = sock
+        self._metrics = metrics
+
+    def sendall(self, data, *args):
+        self._sock.sendall(data, *args)
+        self._metrics.count_traffic(bytes_out=len(data))
+
+    def recv(self, *args):
+        data = self._sock.recv(*args)
+        self._metrics.count_traffic(bytes_in=len(data))
+        return data
+
+    def recv_into(self, *args):
+        count = self._sock.recv_into(*args)
+        self._metrics.count_traffic(bytes_in=count)
+        return count
+
+    def __getattr__(self, name):
+        return getattr(self._sock, name)
+
+class InstrumentedConnection(redis.Connection): # pool connection class, the pool passes metrics through connection_kwargs
+    bound_metrics = None  # set on the subclasses made by bound_connection_class
+
+    def __init__(self, metrics=None, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = metrics if metrics is not None else self.bound_metrics
+
+    def _connect(self):
+        return CountingSocket(super()._connect(), self.metrics)
+
+    def send_packed_command(self, command, check_health=True):
+        self.metrics.count_traffic(round_trips=1)
+        super().send_packed_command(command, check_health)
+
+class InstrumentedPipeline(redis.client.Pipeline): # times a pipeline as a whole, MULTI for transactions
+    metrics = None
+
+    def execute(self, raise_on_error=True):
+        commands = len(self.command_stack)
+        if not commands:
+            return super().execute(raise_on_error)
+        self.metrics.count_commands(commands)
+        with self.metrics.timed("commands", "MULTI" if self.transaction else "PIPELINE"):
+            return super().execute(raise_on_error)
+
+class InstrumentedRedis(redis.Redis): # Redis client recording every command in metrics
+    def __init__(self, metrics, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+
+    def execute_command(self, *args, **options):
+        self.metrics.count_commands(1)
+        with self.metrics.timed("commands", str(args[0]).upper()):
+            return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        pipe = InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+        pipe.metrics = self.metrics
+        return pipe
+
+def bound_connection_class(metrics): # InstrumentedConnection recording into metrics, for clients that drop unknown connection kwargs (RedisCluster)
+    return type("BoundInstrumentedConnection", (InstrumentedConnection,), {"bound_metrics": metrics})
+
+class InstrumentedClusterPipeline(redis.cluster.ClusterPipeline): # InstrumentedPipeline for a cluster, which sends one pipeline per node
+    metrics = None
+    transaction = False  # ClusterPipeline keeps it in its execution strategy only
+
+    def execute(self, raise_on_error=True):
+        commands = len(self)
+        if not commands:
+            return super().execute(raise_on_error)
+        self.metrics.count_commands(commands)
+        with self.metrics.timed("commands", "MULTI" if self.transaction else "PIPELINE"):
+            return super().execute(raise_on_error)
+
+class InstrumentedRedisCluster(redis.cluster.RedisCluster): # RedisCluster recording every command in metrics
+    def __init__(self, metrics, **kwargs):
+        self.metrics = metrics  # RedisCluster sends COMMAND while it initializes
+        super().__init__(connection_class=bound_connection_class(metrics), **kwargs)
+
+    def execute_command(self, *args, **options):
+        self.metrics.count_commands(1)
+        with self.metrics.timed("commands", str(args[0]).upper()):
+            return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=None, shard_hint=None):
+        pipe = super().pipeline(transaction, shard_hint)
+        pipe.__class__ = InstrumentedClusterPipeline  # RedisCluster builds the pipeline itself, only execute differs
+        pipe.metrics = self.metrics
+        pipe.transaction = bool(transaction)
+        return pipe
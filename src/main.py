@@ -1,21 +1,53 @@
 import sys
 import qdarkstyle
 import csv
-from PySide6.QtWidgets import QApplication, QMainWindow, QMessageBox, QTableWidget, QTableWidgetItem, QDialog, QFileDialog
-from PySide6.QtCore import QSettings, QDate
+import os
+import time
+import json
+from PySide6.QtWidgets import QApplication, QMainWindow, QMessageBox, QTableView, QHeaderView, QDialog, QFileDialog, QInputDialog, QProgressBar, QPushButton, QLabel, QListWidgetItem
+from PySide6.QtCore import Qt, QSettings, QDate, QThreadPool, QTimer
 from main_ui import Ui_MainWindow as main_ui
 from about_ui import Ui_Dialog as about_ui
+from workers import Worker
+from person_model import PendingEdits, PersonTableModel, PagedPersonModel, PAGE_SIZE
+from cluster_repository import ClusterPersonRepository
+from person_repository import PersonRepository, CsvFormatError, read_people_csv, write_people_csv, join_date_bound, search_matches, COLUMNS, FIELDS, FACET_INDEXES, RECORD_FORMATS, VERSION_FIELD
+from instrumentation import Metrics
+from bulk_import import ParallelImport, DEFAULT_WRITERS
 import redis
 from cryptography.fernet import Fernet
 import uuid
 
+TABLE_SIZE_SAMPLE = 200  # rows measured per batch when sizing the table columns
+TABLE_CELL_PADDING = 16  # pixels added to the measured text width of a column
+METRICS_REFRESH_MS = 1000  # how often the status bar metrics summary is redrawn
+DEFAULT_SAVE_INTERVAL_MS = 2000  # how long edited cells wait before they are written, 0 writes them only on Update
+EDIT_CONFLICTS_LISTED = 10  # rows named in the edit conflict message
+
 class MainWindow(QMainWindow, main_ui): # used to display the main user interface
     def __init__(self):
         super().__init__()
         self.setupUi(self)  # loads main_ui
+        self.batch_size = PersonRepository.DEFAULT_BATCH_SIZE  # number of records fetched per pipelined round trip
+        self.cache_size = PersonRepository.DEFAULT_CACHE_SIZE  # records kept in the client-side cache, 0 disables it
+        self.record_format = PersonRepository.DEFAULT_RECORD_FORMAT  # how new writes lay out a person hash on the server
+        self.connection_options = dict(PersonRepository.DEFAULT_CONNECTION_OPTIONS)  # pool, timeout and retry settings (settings.ini only)
+        self.import_writers = DEFAULT_WRITERS  # connections writing at once during Import CSV Files (settings.ini only)
+        self.save_interval = DEFAULT_SAVE_INTERVAL_MS  # write-behind delay for cells edited in the table
         self.settings_manager = SettingsManager(self)  # Initializes SettingsManager
         self.settings_manager.load_settings()  # Load settings when the app starts
         self.redis_cloud = None
+        self.thread_pool = QThreadPool.globalInstance()  # all Redis I/O runs here, never on the GUI thread
+        self.active_worker = None
+        self.background_workers = set()  # page fetches and facet counts in flight, held so their signals outlive the call that started them
+        self.facet_selection = {}  # Department/Country value picked in the facet panel, narrows searches
+        self.change_cursor = None  # change log position the table is current with, None until a query or search completes
+        self.table_search = None  # (first, last, ranges, facets) of the search the table shows, None for everyone
+        self.live_pool = QThreadPool(self)  # the live sync follower blocks on XREAD, so it gets a thread of its own
+        self.live_pool.setMaxThreadCount(1)
+        self.live_worker = None
+        self.live_pending = []  # live changes held back while an operation that refers to row numbers runs
+        self.metrics = Metrics()  # Redis command, user action and table update timings, kept across reconnects
 
         # Populate the department combo box
         departments = [
@@ -34,6 +66,21 @@ class MainWindow(QMainWindow, main_ui): # used to display the main user interfac
         self.action_dark_mode.toggled.connect(self.dark_mode)
         self.action_about_qt.triggered.connect(lambda: QApplication.aboutQt())
         self.action_about.triggered.connect(lambda: AboutWindow(dark_mode=self.action_dark_mode.isChecked()).exec())
+        self.action_batch_size.triggered.connect(self.set_batch_size)
+        self.action_cache_size.triggered.connect(self.set_cache_size)
+        self.action_save_interval.triggered.connect(self.set_save_interval)
+        self.action_async_engine.triggered.connect(self.set_async_engine)
+        self.action_live_sync.toggled.connect(self.set_live_sync)
+        self.action_scan_filter.toggled.connect(self.set_scan_filter)
+        self.action_cluster_mode.toggled.connect(self.set_cluster_mode)
+        self.action_record_format.triggered.connect(self.set_record_format)
+        self.action_migrate_records.triggered.connect(self.migrate_records)
+        self.action_delete_matching.triggered.connect(self.delete_matching)
+        self.action_rebuild_search_index.triggered.connect(self.rebuild_search_index)
+        self.action_import_files.triggered.connect(self.import_files)
+        self.action_export_all.triggered.connect(self.export_all_to_csv)
+        self.action_dump_metrics.triggered.connect(self.dump_metrics)
+        self.action_reset_metrics.triggered.connect(self.reset_metrics)
 
         # buttons
         self.button_connect.clicked.connect(self.redis_connection) # Connect button is pressed
@@ -41,16 +88,58 @@ class MainWindow(QMainWindow, main_ui): # used to display the main user interfac
         self.button_update.clicked.connect(self.redis_update) # Update button is pressed
         self.button_delete.clicked.connect(self.redis_delete) # Delete button is pressed
         self.button_query.clicked.connect(self.redis_query) # Query button is pressed
+        self.button_refresh.clicked.connect(self.redis_refresh) # Refresh button is pressed
         self.button_search.clicked.connect(self.redis_search) # Search button is pressed
         self.button_import_csv.clicked.connect(self.import_csv) # Import CSV button is pressed
         self.button_export_csv.clicked.connect(self.export_to_csv) # Export to CSV button is pressed
 
+        # status bar progress and cancel for background operations
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMaximumWidth(200)
+        self.progress_bar.setVisible(False)
+        self.button_cancel = QPushButton("Cancel")
+        self.button_cancel.setVisible(False)
+        self.button_cancel.clicked.connect(self.cancel_worker) # Cancel button is pressed
+        self.statusbar.addPermanentWidget(self.progress_bar)
+        self.statusbar.addPermanentWidget(self.button_cancel)
+
+        # live metrics summary, redrawn on a timer so busy workers don't flood the GUI thread
+        self.label_metrics = QLabel()
+        self.statusbar.addPermanentWidget(self.label_metrics)
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.timeout.connect(self.update_metrics_summary)
+        self.metrics_timer.start(METRICS_REFRESH_MS)
+        self.update_metrics_summary()
+
+        # cells edited in the table are written behind, only the fields that changed
+        self.pending_edits = PendingEdits(self)
+        self.pending_edits.changed.connect(self.pending_edits_changed)
+        self.saving_edits = None  # ({id: {field: value}}, {id: base version}) being written, None when no save is in flight
+        self.label_pending = QLabel()
+        self.label_pending.setVisible(False)
+        self.statusbar.addPermanentWidget(self.label_pending)
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.timeout.connect(self.save_edits)
+
         self.label_connection.setText("Not connected to RedisCloud")
 
+        # table view backed by a column-oriented model, or by pages of the order index with Virtual Scrolling
+        self.list_model = PersonTableModel(self.pending_edits, self)
+        self.paged_model = PagedPersonModel(self.request_page, self.pending_edits, self)
+        self.table_model = self.list_model
+        self.table.setModel(self.table_model)
+        self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)  # uniform rows, no per-row measuring
+
+        # facet panel, counts come from the per-value id sets
+        self.facet_lists = {"Department": self.list_department_facet, "Country": self.list_country_facet}
+        for field, facet_list in self.facet_lists.items():
+            facet_list.itemClicked.connect(lambda item, field=field: self.facet_clicked(field, item))
+
         self.clear_fields()  # Clear input fields on startup
 
     def redis_send(self): # send data to RedisCloud (send button is pressed)
-        if self.redis_cloud is None or not self.redis_cloud.check_connection():
+        if self.redis_cloud is None:
             QMessageBox.warning(self, "Connection Error", "Please connect to Redis first")
             return
 
@@ -69,9 +158,6 @@ class MainWindow(QMainWindow, main_ui): # used to display the main user interfac
         country = self.line_country.text().strip()
         misc = self.line_misc.text().strip()
 
-        row = self.table.rowCount()
-        self.populate_table(row, id, firstname, middlename, lastname, age, title, joindate, department, address1, address2, country, misc)
-
         # Prepare the data dictionary
         data = {
             "_id": id,
@@ -88,82 +174,139 @@ class MainWindow(QMainWindow, main_ui): # used to display the main user interfac
             "Misc": misc
         }
 
-        try:
-            # Get Redis client and store the data as a hash
-            redis_client = self.redis_cloud.get_client()
-            # Using HSET to store the dictionary with the ID as the key
-            redis_client.hset(f"person:{id}", mapping=data)
-            
-            # Optional: Keep track of all person IDs in a set
-            redis_client.sadd("person_ids", id)
-            
-            QMessageBox.information(self, "Success", "Data successfully sent to Redis")
-        except redis.RedisError as e:
-            QMessageBox.critical(self, "Redis Error", f"Failed to send data to Redis: {str(e)}")
+        self.append_to_table([dict(data, **{VERSION_FIELD: None})])  # the version is known once the write lands
+
+        self.run_worker(self._send_task, data, on_result=self.send_finished, error_message="Failed to send data to Redis", action="send")
 
         self.clear_fields()
 
-    def redis_update(self): # update information in RedisCloud (update button is pressed)
-        if self.redis_cloud is None or not self.redis_cloud.check_connection():
+    def _send_task(self, worker, data): # runs on the worker thread
+        # Store the data as a hash keyed by ID, tracked in person_ids and the name index
+        return self.redis_cloud.put_many([data], new=True)
+
+    def send_finished(self, versions):
+        self.table_model.set_versions(versions)
+        self.pending_edits.rebase(dict.fromkeys(versions), versions)  # cells edited before the write landed build on it
+        self.pending_edits_changed(self.pending_edits.count())  # and are saved from the next interval on
+        QMessageBox.information(self, "Success", "Data successfully sent to Redis")
+        self.refresh_facets()
+
+    def redis_update(self): # update information in RedisCloud (update button is pressed), writes every edited cell now
+        if self.redis_cloud is None:
             QMessageBox.warning(self, "Connection Error", "Please connect to Redis first")
             return
-
-        # Get selected rows
-        selected_rows = set(index.row() for index in self.table.selectedIndexes())
-        if not selected_rows:
-            QMessageBox.warning(self, "Selection Error", "Please select at least one row to update")
+        if self.saving_edits is not None:
+            QMessageBox.information(self, "Update", "Edits are being saved, try again in a moment")
+            return
+        if not self.pending_edits.people:
+            QMessageBox.information(self, "Update", "No edited cells to save, edit a cell in the table first")
+            return
+        changes, versions = self.pending_edits.ready()
+        if not changes:
+            QMessageBox.information(self, "Update", "The edited rows are still being sent, try again in a moment")
             return
 
+        self.save_timer.stop()
+        self.saving_edits = (changes, versions)
+        self.pending_edits.take(changes)
+        self.run_worker(self._update_task, self.redis_cloud, *self.saving_edits, on_result=self.update_finished, on_error=self.update_failed,
+                        error_message="Failed to update Redis", action="update")
+
+    def _update_task(self, worker, redis_cloud, changes, versions): # runs on the worker thread
+        # HSET only the changed fields of people still at the version they were edited from, and move their index entries
+        return changes, versions, redis_cloud.put_fields(changes, versions)
+
+    def update_finished(self, result):
+        changes, saved = self.edits_saved(result)
+        message = f"Successfully updated {len(saved['versions'])} record(s) in Redis"
+        if saved["missing"]:
+            message += f", {len(saved['missing'])} edited record(s) were deleted meanwhile"
+        if not saved["conflicts"]:
+            QMessageBox.information(self, "Success", message)
+        self.report_conflicts(changes, saved["conflicts"], message)
+
+    def update_failed(self, error):
+        saving, self.saving_edits = self.saving_edits, None
+        self.pending_edits.restore(*saving)
+        self.worker_error(self.active_worker, error)  # error is emitted before finished, so the worker is still active
+
+    def save_edits(self): # the save interval passed since the first unsaved edit, writes them without blocking the window
+        if self.saving_edits is not None or self.redis_cloud is None:
+            return
+        changes, versions = self.pending_edits.ready()  # edits of rows still being sent wait for send_finished
+        if not changes:
+            return
+        self.saving_edits = (changes, versions)  # set first, so the indicator reads "Saving"
+        self.pending_edits.take(changes)
+        redis_cloud = self.redis_cloud
+        self.run_background(lambda worker: self._update_task(worker, redis_cloud, changes, versions), on_result=self.save_finished, on_error=self.save_failed,
+                            action="save_edits")
+
+    def save_finished(self, result):
+        changes, saved = self.edits_saved(result)
+        message = f"Saved {sum(len(changes[person_id]) for person_id in saved['versions'])} edited cell(s)"
+        if saved["missing"]:
+            message += f", {len(saved['missing'])} record(s) were deleted meanwhile"
+        self.statusbar.showMessage(message)
+        self.report_conflicts(changes, saved["conflicts"], message)
+
+    def save_failed(self, error):
+        saving, self.saving_edits = self.saving_edits, None
+        self.pending_edits.restore(*saving)  # starts the next interval
+        self.statusbar.showMessage(f"Saving edits failed: {str(error)}, they are kept for the next save")
+
+    def edits_saved(self, result): # common tail of an Update and a write-behind save, returns the edits and put_fields' report
+        changes, versions, saved = result
+        self.saving_edits = None
+        self.table_model.set_versions(saved["versions"])
+        self.pending_edits.rebase(versions, saved["versions"])
+        # Rows changed elsewhere show what is stored now, edits made to them meanwhile would conflict again
+        rejected = [person_data["_id"] for person_data in saved["conflicts"]] + saved["missing"]
+        if rejected:
+            self.pending_edits.discard(rejected)
+        if saved["conflicts"]:
+            self.table_model.apply_changes(saved["conflicts"], [])
+        self.pending_edits_changed(self.pending_edits.count())  # edits made while saving start the next interval
+        self.size_columns(list(changes.values()))
+        if any(field in FACET_INDEXES for fields in changes.values() for field in fields):
+            self.refresh_facets()
+        return changes, saved
+
+    def report_conflicts(self, changes, conflicts, message): # lists the rows whose edits lost to another client's write
+        if not conflicts:
+            return
+        lines = [f"{person_data.get('First Name', '')} {person_data.get('Last Name', '')} ({person_data['_id']}): {', '.join(changes[person_data['_id']])}"
+                 for person_data in conflicts[:EDIT_CONFLICTS_LISTED]]
+        if len(conflicts) > EDIT_CONFLICTS_LISTED:
+            lines.append(f"... and {len(conflicts) - EDIT_CONFLICTS_LISTED} more")
+        QMessageBox.warning(self, "Edit Conflicts", f"{message}.\n\n{len(conflicts)} record(s) were changed by someone else after you edited them. "
+                            "Those edits were not saved, the rows now show the stored values:\n\n" + "\n".join(lines))
+
+    def pending_edits_changed(self, count): # redraws the pending indicator and schedules the next save
+        self.label_pending.setVisible(bool(count) or self.saving_edits is not None)
+        self.label_pending.setText(f"{count} unsaved cell(s)" if count else "Saving edits...")
+        if count and self.save_interval and self.saving_edits is None and not self.save_timer.isActive():
+            self.save_timer.start(self.save_interval)
+
+    def save_pending_edits_now(self): # writes the pending edits on the GUI thread, before closing or switching servers
+        self.save_timer.stop()
+        if self.redis_cloud is None or not self.pending_edits.people:
+            return
         try:
-            redis_client = self.redis_cloud.get_client()
-            updated_count = 0
-
-            # Process each selected row
-            for row in selected_rows:
-                # Get all items from the row
-                id_item = self.table.item(row, 0)  # ID column
-                if not id_item:
-                    continue
-
-                id = id_item.text()
-                
-                # Create updated data dictionary from table
-                data = {
-                    "_id": id,
-                    "First Name": self.table.item(row, 1).text() if self.table.item(row, 1) else "",
-                    "Middle Name": self.table.item(row, 2).text() if self.table.item(row, 2) else "",
-                    "Last Name": self.table.item(row, 3).text() if self.table.item(row, 3) else "",
-                    "Age": self.table.item(row, 4).text() if self.table.item(row, 4) else "",
-                    "Title": self.table.item(row, 5).text() if self.table.item(row, 5) else "",
-                    "Join Date": self.table.item(row, 6).text() if self.table.item(row, 6) else "",
-                    "Department": self.table.item(row, 7).text() if self.table.item(row, 7) else "",
-                    "Address 1": self.table.item(row, 8).text() if self.table.item(row, 6) else "",
-                    "Address 2": self.table.item(row, 9).text() if self.table.item(row, 7) else "",
-                    "Country": self.table.item(row, 10).text() if self.table.item(row, 8) else "",
-                    "Misc": self.table.item(row, 11).text() if self.table.item(row, 9) else ""
-                }
-
-                # Update the Redis hash
-                redis_client.hset(f"person:{id}", mapping=data)
-                updated_count += 1
-
-            QMessageBox.information(self, "Success", f"Successfully updated {updated_count} record(s) in Redis")
-            
+            saved = self.redis_cloud.put_fields(*self.pending_edits.take())
         except redis.RedisError as e:
-            QMessageBox.critical(self, "Redis Error", f"Failed to update Redis: {str(e)}")
-        except AttributeError as e:
-            QMessageBox.critical(self, "Table Error", f"Error reading table data: {str(e)}")
-
-        self.table.resizeColumnsToContents()
-        self.table.resizeRowsToContents()
+            QMessageBox.warning(self, "Unsaved Edits", f"Edited cells could not be saved: {str(e)}")
+            return
+        if saved["conflicts"]:
+            QMessageBox.warning(self, "Edit Conflicts", f"{len(saved['conflicts'])} edited record(s) were changed by someone else and were not saved")
 
     def redis_delete(self): # delete information from RedisCloud (delete button is pressed)
-        if self.redis_cloud is None or not self.redis_cloud.check_connection():
+        if self.redis_cloud is None:
             QMessageBox.warning(self, "Connection Error", "Please connect to Redis first")
             return
 
         # Get selected rows
-        selected_rows = sorted(set(index.row() for index in self.table.selectedIndexes()), reverse=True)
+        selected_rows = self.selected_rows()
         if not selected_rows:
             QMessageBox.warning(self, "Selection Error", "Please select at least one row to delete")
             return
@@ -175,157 +318,417 @@ class MainWindow(QMainWindow, main_ui): # used to display the main user interfac
         if reply == QMessageBox.No:
             return
 
-        try:
-            redis_client = self.redis_cloud.get_client()
-            deleted_count = 0
+        # Get the person_id of each row from the ID column
+        deletions = [(row, self.table_model.record(row)["_id"]) for row in selected_rows]
+        deletions = [(row, person_id) for row, person_id in deletions if person_id]  # rows of a page still loading
 
-            # Process each selected row
-            for row in selected_rows:
-                # Get the person_id from the first column
-                id_item = self.table.item(row, 0)  # ID column
-                if not id_item:
-                    continue
+        self.run_worker(self._delete_task, deletions, on_result=self.delete_finished, error_message="Failed to delete from Redis", action="delete")
 
-                person_id = id_item.text()
-                
-                # Delete from Redis
-                redis_client.delete(f"person:{person_id}")  # Delete the hash
-                redis_client.srem("person_ids", person_id)  # Remove from set
-                
-                # Remove row from table
-                self.table.removeRow(row)
-                deleted_count += 1
+    def _delete_task(self, worker, deletions): # runs on the worker thread, returns the rows and ids that were deleted
+        # Delete the hashes, their person_ids entries and their name index entries
+        self.redis_cloud.delete_many([person_id for row, person_id in deletions])
+        return deletions
 
-            QMessageBox.information(self, "Success", f"Successfully deleted {deleted_count} record(s) from Redis and table")
-            
-        except redis.RedisError as e:
-            QMessageBox.critical(self, "Redis Error", f"Failed to delete from Redis: {str(e)}")
-        except AttributeError as e:
-            QMessageBox.critical(self, "Table Error", f"Error reading table data: {str(e)}")
+    def delete_finished(self, deletions):
+        self.pending_edits.discard([person_id for row, person_id in deletions])  # nothing left to save them to
+        deleted_rows = [row for row, person_id in deletions]
+        # Remove rows from table
+        with self.metrics.timed("table", "remove_rows"):
+            self.table_model.remove_rows(deleted_rows)
+
+        QMessageBox.information(self, "Success", f"Successfully deleted {len(deleted_rows)} record(s) from Redis and table")
+        self.refresh_facets()
 
     def redis_query(self): # query information in RedisCloud (query button is pressed)
-        if self.redis_cloud is None or not self.redis_cloud.check_connection():
+        if self.redis_cloud is None:
             QMessageBox.warning(self, "Connection Error", "Please connect to Redis first")
             return
 
-        try:
-            redis_client = self.redis_cloud.get_client()
-            
-            # Get all person IDs from the set
-            person_ids = redis_client.smembers("person_ids")
-            if not person_ids:
-                QMessageBox.information(self, "Query Result", "No records found in Redis")
-                self.table.setRowCount(0)  # Clear the table
-                return
-
-            # Clear existing table content
-            self.table.setRowCount(0)
-            
-            # Populate table with data from Redis
-            row = 0
-            for person_id in person_ids:
-                # Get all fields for this person
-                person_data = redis_client.hgetall(f"person:{person_id}")
-                
-                # Extract values with defaults if fields are missing
-                id = person_data.get("_id", person_id)
-                firstname = person_data.get("First Name", "")
-                middlename = person_data.get("Middle Name", "")
-                lastname = person_data.get("Last Name", "")
-                age = person_data.get("Age", "")
-                title = person_data.get("Title", "")
-                joindate = person_data.get("Join Date", "")
-                department = person_data.get("Department", "")
-                address1 = person_data.get("Address 1", "")
-                address2 = person_data.get("Address 2", "")
-                country = person_data.get("Country", "")
-                misc = person_data.get("Misc", "")
-                
-                # Add to table
-                self.populate_table(row, id, firstname, middlename, lastname, age, title, joindate, department, address1, address2, country, misc)
-                row += 1
+        # Load all person records, page by page when streaming
+        self.load_people(self.query_finished, error_message="Failed to query Redis")
 
-            QMessageBox.information(self, "Success", f"Retrieved {row} record(s) from Redis")
-            
-        except redis.RedisError as e:
-            QMessageBox.critical(self, "Redis Error", f"Failed to query Redis: {str(e)}")
+    def query_finished(self, result):
+        if result["cancelled"]:
+            return
+        if result["rows"] == 0:
+            QMessageBox.information(self, "Query Result", "No records found in Redis")
+            return
+        if result.get("paged"):
+            return  # the status bar shows the count, pages load as they scroll into view
+
+        stats = result["stats"]
+        QMessageBox.information(self, "Success", f"Retrieved {result['rows']} record(s) from Redis in {stats['seconds']:.2f}s ({stats['round_trips']} round trips){self.cache_summary()}")
 
     def redis_search(self):  # Search information in RedisCloud
-        if self.redis_cloud is None or not self.redis_cloud.check_connection():
+        if self.redis_cloud is None:
             QMessageBox.warning(self, "Connection Error", "Please connect to Redis first")
             return
 
-        # Get search criteria (no need to lowercase here, we'll handle it in comparison)
+        # Get search criteria (matching is case-insensitive)
         firstname_search = self.line_firstname_search.text().strip()
         lastname_search = self.line_lastname_search.text().strip()
+        try:
+            ranges = self.search_ranges()
+        except ValueError as e:
+            QMessageBox.warning(self, "Input Error", str(e))
+            return
+
+        facets = dict(self.facet_selection)
+
+        # If every field is empty and no facet is picked, show all records (same as query)
+        if not firstname_search and not lastname_search and not ranges and not facets:
+            self.load_people(error_message="Failed to search Redis")
+        else:
+            # Resolve matching ids from the name, facet and range indexes, fetching only the hits
+            self.show_model(self.list_model)
+            self.run_worker(self._search_task, firstname_search, lastname_search, ranges, facets, self.action_streaming_load.isChecked(),
+                            on_result=lambda result: self.table_loaded(result, (firstname_search, lastname_search, ranges, facets), self.search_finished), on_progress=self.append_records, error_message="Failed to search Redis", cancellable=True, action="search")
+
+    def search_ranges(self): # {field: (low, high)} from the Age and Join Date range inputs, raises ValueError on bad input
+        ranges = {}
+        age_min = self.line_age_min.text().strip()
+        age_max = self.line_age_max.text().strip()
+        if age_min or age_max:
+            try:
+                ranges["Age"] = (float(age_min) if age_min else None, float(age_max) if age_max else None)
+            except ValueError:
+                raise ValueError("Age range bounds must be numbers")
+        joined_from = self.line_joined_from.text().strip()
+        joined_to = self.line_joined_to.text().strip()
+        if joined_from or joined_to:
+            ranges["Join Date"] = (join_date_bound(joined_from) if joined_from else None, join_date_bound(joined_to, upper=True) if joined_to else None)
+        return ranges
+
+    def _search_task(self, worker, firstname_search, lastname_search, ranges, facets, streaming): # runs on the worker thread
+        rows = []
+        cursor = self.redis_cloud.change_cursor()
+        for records, stats in self.redis_cloud.search(firstname_search, lastname_search, ranges=ranges, facets=facets):
+            if streaming:
+                worker.report_progress({"records": records, "done": stats["scanned"], "total": stats["total"]})
+            else:
+                rows.extend(records)
+            if worker.cancelled:
+                break
+
+        if not streaming:
+            worker.report_progress({"records": rows, "done": stats["total"], "total": stats["total"]})
+        return {"rows": stats["records"], "stats": stats, "cursor": cursor, "cancelled": worker.cancelled}
+
+    def search_finished(self, result):
+        if result["cancelled"]:
+            return
+        if result["rows"] == 0:
+            QMessageBox.information(self, "Search Result", "No matching records found")
+        else:
+            QMessageBox.information(self, "Search Result", f"Found {result['rows']} matching record(s){self.cache_summary()}")
+
+    def facet_clicked(self, field, item): # picks a facet value, or clears it when clicked again, and searches with it
+        value = item.data(Qt.UserRole)
+        if value is None:
+            return  # the placeholder shown until the index is built
+        if self.facet_selection.get(field) == value:
+            del self.facet_selection[field]
+        else:
+            self.facet_selection[field] = value
+        self.refresh_facets()
+        self.redis_search()
 
+    def refresh_facets(self): # recounts every facet value in the background, narrowed by the picked facets
+        if self.redis_cloud is None:
+            return
+        redis_cloud = self.redis_cloud
+        selection = dict(self.facet_selection)
+        self.run_background(lambda worker: redis_cloud.facet_counts(selection), on_result=self.show_facets, action="facet_counts")
+
+    def show_facets(self, counts): # fills the facet lists, largest count first
+        for field, facet_list in self.facet_lists.items():
+            facet_list.clear()
+            if counts is None:
+                item = QListWidgetItem("Rebuild the search index to count")
+                item.setFlags(Qt.NoItemFlags)
+                facet_list.addItem(item)
+                continue
+            selected = self.facet_selection.get(field)
+            for value, count in sorted(counts[field].items(), key=lambda value_count: (-value_count[1], value_count[0])):
+                if count == 0 and value != selected:
+                    continue  # every person with this value was deleted or narrowed away
+                item = QListWidgetItem(f"{value} ({count})")
+                item.setData(Qt.UserRole, value)
+                facet_list.addItem(item)
+                item.setSelected(value == selected)
+
+    def delete_matching(self): # deletes every record matching the search fields and facets on the server, without loading them (Tools menu)
+        if self.redis_cloud is None:
+            QMessageBox.warning(self, "Connection Error", "Please connect to Redis first")
+            return
+
+        firstname_search = self.line_firstname_search.text().strip()
+        lastname_search = self.line_lastname_search.text().strip()
         try:
-            redis_client = self.redis_cloud.get_client()
-            
-            # Get all person IDs
-            person_ids = redis_client.smembers("person_ids")
-            if not person_ids:
-                QMessageBox.information(self, "Search Result", "No records found in Redis")
-                self.table.setRowCount(0)
-                return
-
-            # Clear existing table content
-            self.table.setRowCount(0)
-            
-            row = 0
-            matches = 0
-            
-            # If both fields are empty, show all records (same as query)
-            if not firstname_search and not lastname_search:
-                for person_id in person_ids:
-                    person_data = redis_client.hgetall(f"person:{person_id}")
-                    self._populate_search_result(row, person_data)
-                    row += 1
-                    matches += 1
+            ranges = self.search_ranges()
+        except ValueError as e:
+            QMessageBox.warning(self, "Input Error", str(e))
+            return
+        facets = dict(self.facet_selection)
+        if not firstname_search and not lastname_search and not ranges and not facets:
+            QMessageBox.warning(self, "Delete All Matching", "Enter search criteria or pick a facet first, an empty search matches everyone")
+            return
+
+        criteria = [f"{label} contains \"{text}\"" for label, text in (("First name", firstname_search), ("Last name", lastname_search)) if text]
+        if "Age" in ranges:
+            criteria.append(f"Age is {self.line_age_min.text().strip() or 'any'} to {self.line_age_max.text().strip() or 'any'}")
+        if "Join Date" in ranges:
+            criteria.append(f"Join Date is {self.line_joined_from.text().strip() or 'any'} to {self.line_joined_to.text().strip() or 'any'}")
+        criteria += [f"{field} is {value}" for field, value in facets.items()]
+        reply = QMessageBox.question(self, "Confirm Deletion", "Delete every record where " + ", ".join(criteria) + "?\n\nThis can't be undone.",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if reply == QMessageBox.No:
+            return
+
+        self.run_worker(self._delete_matching_task, firstname_search, lastname_search, ranges, facets, on_result=self.delete_matching_finished,
+                        on_progress=self.update_progress, error_message="Failed to delete from Redis", cancellable=True, action="delete_matching")
+
+    def _delete_matching_task(self, worker, firstname_search, lastname_search, ranges, facets): # runs on the worker thread
+        deleted = 0
+        for deleted, checked, total in self.redis_cloud.delete_matching(firstname_search, lastname_search, ranges, facets):
+            worker.report_progress({"done": checked, "total": total})
+            if worker.cancelled:
+                break
+        return {"rows": deleted, "cancelled": worker.cancelled}
+
+    def delete_matching_finished(self, result):
+        message = f"Deleted {result['rows']} matching record(s) from Redis"
+        if result["cancelled"]:
+            QMessageBox.warning(self, "Delete All Matching", message + " before the deletion was cancelled")
+        else:
+            QMessageBox.information(self, "Success", message)
+        if self.change_cursor is not None and self.table_model is self.list_model:
+            self.redis_refresh()  # the deletions are in the change log, so only the deleted rows leave the table
+        self.refresh_facets()
+
+    def rebuild_search_index(self): # recreates the name index for data written before it existed (Tools menu)
+        if self.redis_cloud is None:
+            QMessageBox.warning(self, "Connection Error", "Please connect to Redis first")
+            return
+
+        self.run_worker(self._rebuild_search_index_task, on_result=self.rebuild_search_index_finished, on_progress=self.update_progress,
+                        error_message="Failed to rebuild the search index", cancellable=True, action="rebuild_search_index")
+
+    def _rebuild_search_index_task(self, worker): # runs on the worker thread
+        total = self.redis_cloud.count()
+        indexed = 0
+        for indexed in self.redis_cloud.rebuild_search_index():
+            worker.report_progress({"done": indexed, "total": total})
+            if worker.cancelled:
+                break
+        return {"rows": indexed, "cancelled": worker.cancelled}
+
+    def rebuild_search_index_finished(self, result):
+        if result["cancelled"]:
+            QMessageBox.warning(self, "Search Index", "Rebuild cancelled, searches will scan all records until the index is rebuilt")
+        else:
+            QMessageBox.information(self, "Search Index", f"Indexed {result['rows']} record(s)")
+        self.refresh_facets()
+
+    def migrate_records(self): # converts stored records to the selected record format (Tools menu)
+        if self.redis_cloud is None:
+            QMessageBox.warning(self, "Connection Error", "Please connect to Redis first")
+            return
+
+        self.run_worker(self._migrate_records_task, on_result=self.migrate_records_finished, on_progress=self.update_progress,
+                        error_message="Failed to convert records", cancellable=True, action="migrate_records")
+
+    def _migrate_records_task(self, worker): # runs on the worker thread, measures memory per record before and after
+        total = self.redis_cloud.count()
+        before = self.redis_cloud.record_bytes()
+        checked = 0
+        for checked in self.redis_cloud.migrate_records():
+            worker.report_progress({"done": checked, "total": total})
+            if worker.cancelled:
+                break
+        return {"rows": checked, "before": before, "after": self.redis_cloud.record_bytes(), "cancelled": worker.cancelled}
+
+    def migrate_records_finished(self, result):
+        message = f"Checked {result['rows']} record(s), new writes use the {self.record_format} format"
+        if result["before"] and result["after"]:
+            estimated = " (estimated, the server has no MEMORY USAGE)" if result["after"]["estimated"] else ""
+            message += f"\n\nMemory per record: {result['before']['bytes_per_record']:.0f} bytes before, {result['after']['bytes_per_record']:.0f} bytes after{estimated}"
+        if result["cancelled"]:
+            QMessageBox.warning(self, "Conversion Cancelled", message + "\n\nRecords not reached yet keep their old format and still read fine")
+        else:
+            QMessageBox.information(self, "Records Converted", message)
+
+    def load_people(self, on_result=None, error_message="Failed to query Redis"): # clears the table and loads every record in the background
+        if self.action_virtual_scrolling.isChecked():
+            self.run_worker(lambda worker: self.redis_cloud.ordered_count(), on_result=lambda total: self.open_paged(total, on_result, error_message),
+                            error_message=error_message, action="query")
+            return
+        self.load_list(on_result, error_message)
+
+    def load_list(self, on_result, error_message):
+        self.show_model(self.list_model)
+        self.run_worker(self._load_task, self.action_streaming_load.isChecked(),
+                        on_result=lambda result: self.table_loaded(result, None, on_result), on_progress=self.append_records,
+                        error_message=error_message, cancellable=True, action="query")
+
+    def _load_task(self, worker, streaming): # runs on the worker thread, sends pages of records through progress
+        rows = 0
+        cursor = self.redis_cloud.change_cursor()  # taken first, so writes made during the load are replayed by Refresh
+
+        if not streaming:
+            records, stats = self.redis_cloud.query_people()
+            worker.report_progress({"records": records, "done": len(records), "total": len(records)})
+            return {"rows": len(records), "stats": stats, "cursor": cursor, "cancelled": worker.cancelled}
+
+        # Streaming: rows are appended as each SSCAN page arrives
+        total = self.redis_cloud.count()
+        for records, stats in self.redis_cloud.iter_all():
+            rows += len(records)
+            worker.report_progress({"records": records, "done": stats["records"], "total": total})
+            if worker.cancelled:
+                break
+
+        return {"rows": rows, "stats": stats, "cursor": cursor, "cancelled": worker.cancelled}
+
+    def table_loaded(self, result, search, on_result): # remembers where in the change log a finished load or search left the table
+        if not result["cancelled"]:
+            self.change_cursor = result["cursor"]
+            self.table_search = search
+            self.start_live_sync()
+        if on_result is not None:
+            on_result(result)
+
+    def redis_refresh(self): # applies the changes logged since the last query or search (Refresh button is pressed)
+        if self.redis_cloud is None:
+            QMessageBox.warning(self, "Connection Error", "Please connect to Redis first")
+            return
+        if self.change_cursor is None or self.table_model is not self.list_model:
+            self.redis_query()  # nothing to patch, or the paged view which reloads cheaply anyway
+            return
+
+        self.run_worker(lambda worker, cursor: self.redis_cloud.changes_since(cursor), self.change_cursor, on_result=self.refresh_finished,
+                        error_message="Failed to refresh from Redis", action="refresh")
+
+    def refresh_finished(self, changes):
+        self.apply_table_changes(changes, "Refreshed")
+
+    def apply_table_changes(self, changes, label): # patches the table with a changes_since result, or reloads when the log was trimmed
+        if changes["truncated"]:
+            self.statusbar.showMessage("More changes than the change log keeps, reloading")
+            if self.table_search is None:
+                self.redis_query()
             else:
-                # Search through all records
-                for person_id in person_ids:
-                    person_data = redis_client.hgetall(f"person:{person_id}")
-                    
-                    # Get name fields for comparison
-                    firstname = person_data.get("First Name", "")
-                    lastname = person_data.get("Last Name", "")
-                    
-                    # Case-insensitive comparison using lower() or re.IGNORECASE
-                    import re
-                    firstname_match = not firstname_search or re.search(re.escape(firstname_search), firstname, re.IGNORECASE)
-                    lastname_match = not lastname_search or re.search(re.escape(lastname_search), lastname, re.IGNORECASE)
-                    
-                    if firstname_match and lastname_match:
-                        self._populate_search_result(row, person_data)
-                        row += 1
-                        matches += 1
-
-                if matches == 0:
-                    QMessageBox.information(self, "Search Result", "No matching records found")
-                else:
-                    QMessageBox.information(self, "Search Result", f"Found {matches} matching record(s)")
+                self.redis_search()
+            return
 
-        except redis.RedisError as e:
-            QMessageBox.critical(self, "Redis Error", f"Failed to search Redis: {str(e)}")
-
-    def _populate_search_result(self, row, person_data): # populates the table after searching
-        id = person_data.get("_id", "")
-        firstname = person_data.get("First Name", "")
-        middlename = person_data.get("Middle Name", "")
-        lastname = person_data.get("Last Name", "")
-        age = person_data.get("Age", "")
-        title = person_data.get("Title", "")
-        joindate = person_data.get("Join Date", "")
-        department = person_data.get("Department", "")
-        address1 = person_data.get("Address 1", "")
-        address2 = person_data.get("Address 2", "")
-        country = person_data.get("Country", "")
-        misc = person_data.get("Misc", "")
-        
-        self.populate_table(row, id, firstname, middlename, lastname, age, title, joindate, department, address1, address2, country, misc)
+        records, deleted = changes["records"], changes["deleted"]
+        if self.table_search is not None:  # people who no longer match the search leave the table
+            deleted = deleted + [person_data["_id"] for person_data in records if not search_matches(person_data, *self.table_search)]
+            records = [person_data for person_data in records if search_matches(person_data, *self.table_search)]
+        with self.metrics.timed("table", "apply_changes"):
+            updated, added, removed = self.table_model.apply_changes(records, deleted)
+        self.size_columns(records)
+        self.change_cursor = changes["cursor"]
+        self.statusbar.showMessage(f"{label} from {changes['entries']} change(s): {updated} updated, {added} added, {removed} removed")
+
+    def set_live_sync(self, checked): # Live Sync is toggled, following the change log to keep the table current
+        if checked:
+            self.start_live_sync()
+        else:
+            self.stop_live_sync()
+
+    def start_live_sync(self): # follows the change log from where the table is, if Live Sync is on and the table holds a query or search
+        self.stop_live_sync()
+        if not self.action_live_sync.isChecked() or self.redis_cloud is None or self.change_cursor is None or self.table_model is not self.list_model:
+            return
+        worker = Worker(self._live_sync_task, self.redis_cloud, self.change_cursor, error_message="Live sync stopped")
+        worker.signals.progress.connect(lambda changes: self.live_changes(worker, changes))
+        worker.signals.error.connect(lambda error: self.live_sync_failed(worker, error))
+        self.live_worker = worker
+        self.live_pool.start(worker)
+
+    def stop_live_sync(self): # the follower notices within one XREAD block
+        if self.live_worker is not None:
+            self.live_worker.cancel()
+            self.live_worker = None
+        self.live_pending = []
+
+    def _live_sync_task(self, worker, redis_cloud, cursor): # runs on the live sync thread until cancelled
+        for changes in redis_cloud.follow_changes(cursor, lambda: worker.cancelled):
+            if worker.cancelled:
+                break
+            worker.report_progress(changes)
+
+    def live_changes(self, worker, changes):
+        if worker is not self.live_worker:
+            return  # sent before the follower was stopped
+        if self.active_worker is not None:
+            self.live_pending.append(changes)  # e.g. a delete in flight holds row numbers
+            return
+        self.apply_table_changes(changes, "Live sync")
+
+    def apply_live_pending(self):
+        pending, self.live_pending = self.live_pending, []
+        for changes in pending:
+            if self.live_worker is not None:  # a truncated batch reloads, which stops the follower
+                self.apply_table_changes(changes, "Live sync")
+
+    def live_sync_failed(self, worker, error):
+        if worker is self.live_worker:
+            self.live_worker = None
+            self.statusbar.showMessage(f"Live sync stopped: {str(error)}, it restarts with the next query")
+
+    def open_paged(self, total, on_result, error_message): # shows the order index page by page, or falls back to a full load until it is built
+        if total is None:
+            def loaded(result):
+                self.statusbar.showMessage("Virtual scrolling needs the order index, run Tools > Rebuild Search Index")
+                if on_result is not None:
+                    on_result(result)
+            self.load_list(loaded, error_message)
+            return
+
+        self.show_model(self.paged_model, total)
+        self.statusbar.showMessage(f"{total} record(s), loaded as they scroll into view")
+        if on_result is not None:
+            on_result({"rows": total, "paged": True, "cancelled": False})
+
+    def request_page(self, page, generation): # fetches a page of the order index for the paged model
+        if self.redis_cloud is None:
+            return
+        redis_cloud = self.redis_cloud
+        self.run_background(lambda worker: redis_cloud.ordered_page(page * PAGE_SIZE, PAGE_SIZE),
+                            on_result=lambda records: self.page_fetched(page, generation, records),
+                            on_error=lambda error: self.paged_model.page_failed(page, generation), action="fetch_page")
+
+    def page_fetched(self, page, generation, records):
+        with self.metrics.timed("table", "set_page"):
+            self.paged_model.set_page(page, generation, records)
+        if generation == self.paged_model.generation:
+            self.size_columns(records)
+
+    def show_model(self, model, total=0): # empties the table and backs it with the given model
+        self.change_cursor = None  # set again once the table holds a complete query or search
+        self.stop_live_sync()
+        if model is self.paged_model:
+            model.reset(total)
+        else:
+            model.clear()
+        if self.table_model is not model:
+            if model is self.list_model:
+                self.paged_model.clear()  # drop the pages while the list model is shown
+            self.table_model = model
+            self.table.setModel(model)
+
+    def append_records(self, progress): # appends a page of records sent by a worker to the table
+        self.append_to_table(progress["records"])
+        self.statusbar.showMessage(f"{self.table_model.rowCount()} loaded")
+        self.update_progress(progress)
 
     def export_to_csv(self):  # exports data to CSV (export to CSV button is pressed)
+        if self.table_model is self.paged_model:
+            self.export_all_to_csv()  # the table holds only the pages in view, export them all from Redis
+            return
+
         self.filename = QFileDialog.getSaveFileName(self, 'Export File', '', 'Data File (*.csv)')
 
         if not self.filename[0]:
@@ -336,95 +739,148 @@ class MainWindow(QMainWindow, main_ui): # used to display the main user interfac
                 writer = csv.writer(file)
                 
                 # Write the header row (column names from the table)
-                headers = [self.table.horizontalHeaderItem(col).text() for col in range(self.table.columnCount())]
-                writer.writerow(headers)
-
-                # Write the data rows from the table
-                for row in range(self.table.rowCount()):
-                    row_data = []
-                    for col in range(self.table.columnCount()):
-                        item = self.table.item(row, col)
-                        # Append the text if the item exists, otherwise append an empty string
-                        row_data.append(item.text() if item else '')
-                    writer.writerow(row_data)
+                writer.writerow(COLUMNS)
+
+                # Write the data rows straight from the table model's columns
+                writer.writerows(self.table_model.rows())
 
             QMessageBox.information(self, "Export Successful", f"Table data exported to {self.filename[0]}")
         
         except Exception as e:
             QMessageBox.critical(self, "Export Error", f"Failed to export to CSV: {str(e)}")
 
+    def export_all_to_csv(self): # streams every record from Redis to a CSV file without loading the table (Tools menu)
+        if self.redis_cloud is None:
+            QMessageBox.warning(self, "Connection Error", "Please connect to Redis first")
+            return
+
+        filename, _ = QFileDialog.getSaveFileName(self, 'Export All Records', '', 'Data File (*.csv)')
+        if not filename:
+            return
+
+        self.run_worker(self._export_all_task, filename, on_result=self.export_all_finished, on_progress=self.export_progress,
+                        error_message="Failed to export to CSV", cancellable=True, action="export_all")
+
+    def _export_all_task(self, worker, filename): # runs on the worker thread, holds one page of records at a time
+        total = self.redis_cloud.count()
+        exported = 0
+
+        with open(filename, 'w', newline='') as file:
+            # No dedupe set, so memory stays flat; an id repeated by a rehash mid-scan is rewritten, which a re-import tolerates
+            pages = (records for records, stats in self.redis_cloud.iter_all(dedupe=False))
+            for exported in write_people_csv(file, pages):
+                worker.report_progress({"done": exported, "total": total})
+                if worker.cancelled:
+                    break
+
+        return {"rows": exported, "filename": filename, "cancelled": worker.cancelled}
+
+    def export_progress(self, progress):
+        self.update_progress(progress)
+        self.statusbar.showMessage(f"{progress['done']} of {progress['total']} exported")
+
+    def export_all_finished(self, result):
+        if result["cancelled"]:
+            QMessageBox.warning(self, "Export Cancelled", f"Export cancelled after {result['rows']} record(s), {result['filename']} is incomplete")
+        else:
+            QMessageBox.information(self, "Export Successful", f"Exported {result['rows']} record(s) from Redis to {result['filename']}")
+
     def import_csv(self):
         filename, _ = QFileDialog.getOpenFileName(self, 'Import CSV File', '', 'CSV Files (*.csv)')
         
         if not filename:
             return
 
-        if self.redis_cloud is None or not self.redis_cloud.check_connection():
+        if self.redis_cloud is None:
             QMessageBox.warning(self, "Connection Error", "Please connect to Redis first")
             return
 
+        self.show_model(self.list_model)
+        self.run_worker(self._import_task, filename, on_result=self.import_finished, on_progress=self.import_progress,
+                        error_message="Failed to import CSV", cancellable=True, action="import")
+
+    def _import_task(self, worker, filename): # runs on the worker thread, writes one MULTI/EXEC per chunk of rows
+        imported_count = 0
+        start = time.perf_counter()
+        file_size = os.path.getsize(filename)
+
+        with open(filename, 'r', newline='') as file:
+            for chunk in self.redis_cloud.put_stream(read_people_csv(file)):
+                imported_count += len(chunk)
+                elapsed = time.perf_counter() - start
+                bytes_read = file.buffer.tell()  # approximate, the text layer reads ahead
+                rate = imported_count / elapsed if elapsed else 0
+                eta = elapsed * (file_size - bytes_read) / bytes_read if bytes_read else 0
+                worker.report_progress({"records": chunk, "done": bytes_read, "total": file_size, "rate": rate, "eta": eta})
+                if worker.cancelled:
+                    break
+        return {"rows": imported_count, "seconds": time.perf_counter() - start, "cancelled": worker.cancelled}
+
+    def import_progress(self, progress): # appends an imported chunk and shows rows/sec and the remaining time
+        self.append_to_table(progress["records"])
+        self.update_progress(progress)
+        self.statusbar.showMessage(f"{self.table_model.rowCount()} imported, {progress['rate']:.0f} rows/s, "
+                                   f"about {progress['eta']:.0f}s left")
+
+    def import_finished(self, result):
+        self.refresh_facets()
+        if result["cancelled"]:
+            QMessageBox.information(self, "Import Cancelled", f"Import cancelled after {result['rows']} record(s)")
+            return
+
+        QMessageBox.information(self, "Import Successful", 
+                                f"Successfully imported {result['rows']} record(s) from CSV in {result['seconds']:.1f}s")
+
+    def import_files(self): # imports many CSV files at once, parsed by a process pool (Tools menu)
+        if self.redis_cloud is None:
+            QMessageBox.warning(self, "Connection Error", "Please connect to Redis first")
+            return
+
+        filenames, _ = QFileDialog.getOpenFileNames(self, 'Import CSV Files', '', 'CSV Files (*.csv)')
+        if not filenames:
+            return
+
+        self.run_worker(self._import_files_task, filenames, on_result=self.import_files_finished, on_progress=self.import_files_progress,
+                        error_message="Failed to import CSV files", cancellable=True, action="import_files")
+
+    def _import_files_task(self, worker, filenames): # runs on the worker thread, the rows go to Redis without filling the table
+        start = time.perf_counter()
+        job = ParallelImport(self.redis_cloud, filenames, writers=self.import_writers)
+        progress = job.progress()
+        runner = job.run()
         try:
-            redis_client = self.redis_cloud.get_client()
-            imported_count = 0
-            
-            with open(filename, 'r', newline='') as file:
-                reader = csv.DictReader(file)
-                
-                expected_headers = {'ID', 'First Name', 'Middle Name', 'Last Name', 'Age', 'Title', 'Join Date', 'Department', 'Address 1', 'Address 2', 'Country', 'Misc'}
-                if not all(header in reader.fieldnames for header in expected_headers):
-                    QMessageBox.warning(self, "CSV Format Error", 
-                                        "CSV file must contain all required headers:"
-                                         "ID, First Name, Middle Name, Last Name, Age, Title, Join Date, Department, Address 1, Address 2, Country, Misc")
-                    return
-
-                self.table.setRowCount(0)
-                
-                for row_num, row in enumerate(reader):
-                    id = row['ID'] if row['ID'] else str(uuid.uuid4())  # Generate a new ID if not provided
-                    
-                    data = {
-                        "_id": id,
-                        "First Name": row['First Name'] or "",
-                        "Middle Name": row['Middle Name'] or "",
-                        "Last Name": row['Last Name'] or "",
-                        "Age": row['Age'] or "",
-                        "Title": row['Title'] or "",
-                        "Join Date": row['Join Date'] or "",
-                        "Department": row['Department'] or "",
-                        "Address 1": row['Address 1'] or "",
-                        "Address 2": row['Address 2'] or "",
-                        "Country": row['Country'] or "",
-                        "Misc": row['Misc'] or ""
-                    }
-                    
-                    redis_client.hset(f"person:{id}", mapping=data)
-                    redis_client.sadd("person_ids", id)
-                    
-                    self.populate_table(row_num, 
-                                        id, 
-                                        data["First Name"], 
-                                        data["Middle Name"],
-                                        data["Last Name"], 
-                                        data["Age"], 
-                                        data["Title"], 
-                                        data["Join Date"], 
-                                        data["Department"],
-                                        data["Address 1"], 
-                                        data["Address 2"], 
-                                        data["Country"],
-                                        data["Misc"])
-                    
-                    imported_count += 1
-
-            QMessageBox.information(self, "Import Successful", 
-                                    f"Successfully imported {imported_count} record(s) from CSV")
-            
-        except FileNotFoundError:
-            QMessageBox.critical(self, "File Error", "Could not find the specified CSV file")
-        except redis.RedisError as e:
-            QMessageBox.critical(self, "Redis Error", f"Failed to import to Redis: {str(e)}")
-        except Exception as e:
-            QMessageBox.critical(self, "Import Error", f"Failed to import CSV: {str(e)}")
+            for progress in runner:
+                elapsed = time.perf_counter() - start
+                rate = progress["imported"] / elapsed if elapsed else 0
+                eta = elapsed * (progress["total"] - progress["done"]) / progress["done"] if progress["done"] else 0
+                worker.report_progress(dict(progress, rate=rate, eta=eta))
+                if worker.cancelled:
+                    break
+        finally:
+            runner.close()  # stops the parser processes and waits for the batches being written
+        return {"progress": progress, "seconds": time.perf_counter() - start, "cancelled": worker.cancelled}
+
+    def import_files_progress(self, progress):
+        self.update_progress(progress)
+        self.statusbar.showMessage(f"{progress['imported']} imported from {len(progress['files'])} file(s), {progress['rate']:.0f} rows/s, "
+                                   f"about {progress['eta']:.0f}s left")
+
+    def import_files_finished(self, result): # reports rows or the error per file
+        self.refresh_facets()
+        progress = result["progress"]
+        lines = []
+        for filename, file in progress["files"].items():
+            if file["error"] is not None:
+                lines.append(f"{os.path.basename(filename)}: failed, {file['error']}")
+            else:
+                lines.append(f"{os.path.basename(filename)}: {file['rows']} row(s)")
+        summary = f"Imported {progress['imported']} record(s) in {result['seconds']:.1f}s\n\n" + "\n".join(lines)
+        if result["cancelled"]:
+            QMessageBox.warning(self, "Import Cancelled", summary)
+        elif any(file["error"] is not None for file in progress["files"].values()):
+            QMessageBox.warning(self, "Import Finished With Errors", summary)
+        else:
+            QMessageBox.information(self, "Import Successful", summary + "\n\nPress Query to load the table")
 
     def redis_connection(self):
         redis_url = self.line_redis_url.text().strip()
@@ -439,40 +895,135 @@ class MainWindow(QMainWindow, main_ui): # used to display the main user interfac
             QMessageBox.warning(self, "Input Error", "Please fill in all fields")
             return
 
-        try:
-            # Create RedisCloud instance with provided details
-            self.redis_cloud = RedisCloud(redis_url, redis_port, redis_user, redis_password)
-            self.update_connection_status()
-            self.initialize_table()
-            self.redis_query()
+        # Create RedisCloud instance with provided details (the constructor pings the server)
+        repository_class = ClusterPersonRepository if self.action_cluster_mode.isChecked() else PersonRepository
+        self.run_worker(lambda worker: repository_class(redis_url, redis_port, redis_user, redis_password, batch_size=self.batch_size,
+                                                         cache_size=self.cache_size, connection_options=self.connection_options, metrics=self.metrics,
+                                                         async_engine=self.action_async_engine.isChecked(), record_format=self.record_format),
+                        on_result=self.connection_established, on_error=self.connection_failed, action="connect")
+
+    def connection_established(self, redis_cloud):
+        self.stop_live_sync()
+        self.thread_pool.waitForDone()  # a save of the edits in flight
+        self.save_pending_edits_now()  # they belong to the server they were loaded from
+        if self.redis_cloud is not None:
+            self.redis_cloud.close()
+        self.redis_cloud = redis_cloud
+        self.redis_cloud.scan_filter = self.action_scan_filter.isChecked()
+        self.update_connection_status()
+        self.initialize_table()
+        self.redis_query()
+        self.refresh_facets()
+
+    def connection_failed(self, error):
+        QMessageBox.critical(self, "Connection Error", f"Failed to connect to Redis: {str(error)}")
+        self.redis_cloud = None
+        self.update_connection_status()
+
+    def run_worker(self, fn, *args, on_result=None, on_progress=None, on_error=None, error_message="Operation failed", cancellable=False, action=None): # runs fn(worker, *args) on the thread pool and delivers its result through signals
+        if action is not None:
+            fn = self.timed_task(action, fn)
+        worker = Worker(fn, *args, error_message=error_message)
+        if on_result is not None:
+            worker.signals.result.connect(on_result)
+        if on_progress is not None:
+            worker.signals.progress.connect(on_progress)
+        worker.signals.error.connect(on_error if on_error is not None else lambda error: self.worker_error(worker, error))
+        worker.signals.finished.connect(lambda: self.worker_finished(worker))
+
+        self.active_worker = worker
+        self.set_busy(True, cancellable)
+        self.thread_pool.start(worker)
+
+    def run_background(self, fn, on_result=None, on_error=None, action=None): # runs a small read on the thread pool outside the busy/cancel machinery
+        worker = Worker(self.timed_task(action, fn) if action is not None else fn)
+        if on_result is not None:
+            worker.signals.result.connect(on_result)
+        if on_error is not None:
+            worker.signals.error.connect(on_error)
+        worker.signals.finished.connect(lambda: self.background_workers.discard(worker))
+        self.background_workers.add(worker)
+        self.thread_pool.start(worker)
+
+    def timed_task(self, action, fn): # wraps a task so its time on the worker thread is recorded as a user action
+        def task(worker, *args):
+            with self.metrics.timed("actions", action):
+                return fn(worker, *args)
+        return task
+
+    def worker_error(self, worker, error): # reports an exception raised by a background operation
+        if isinstance(error, CsvFormatError):
+            QMessageBox.warning(self, "CSV Format Error", str(error))
+        elif isinstance(error, FileNotFoundError):
+            QMessageBox.critical(self, "File Error", "Could not find the specified CSV file")
+        elif isinstance(error, (redis.ConnectionError, redis.TimeoutError)):
+            # The pool already retried with backoff, the next action will try to reconnect again
+            if self.redis_cloud is not None:
+                self.redis_cloud.connected = False
+                self.update_connection_status()
+            QMessageBox.warning(self, "Connection Error", f"{worker.error_message}: {str(error)}")
+        elif isinstance(error, redis.RedisError):
+            QMessageBox.critical(self, "Redis Error", f"{worker.error_message}: {str(error)}")
+        else:
+            QMessageBox.critical(self, "Error", f"{worker.error_message}: {str(error)}")
 
-        except redis.ConnectionError as e:
-            QMessageBox.critical(self, "Connection Error", f"Failed to connect to Redis: {str(e)}")
-            self.redis_cloud = None
+    def worker_finished(self, worker):
+        if worker.error is None and self.redis_cloud is not None and not self.redis_cloud.connected:
+            self.redis_cloud.connected = True  # the pool reconnected
             self.update_connection_status()
+        if worker is self.active_worker:  # a result handler may already have started the next operation
+            self.active_worker = None
+            self.set_busy(False)
+            self.apply_live_pending()
+
+    def cancel_worker(self): # Cancel button is pressed
+        if self.active_worker is not None:
+            self.active_worker.cancel()
+            self.button_cancel.setEnabled(False)
+            self.statusbar.showMessage("Cancelling...")
+
+    def set_busy(self, busy, cancellable=False): # disables the Redis actions while a background operation runs
+        for button in (self.button_connect, self.button_send, self.button_update, self.button_delete,
+                       self.button_query, self.button_refresh, self.button_search, self.button_import_csv, self.button_export_csv):
+            button.setEnabled(not busy)
+        self.menuTools.setEnabled(not busy)
+        for facet_list in self.facet_lists.values():
+            facet_list.setEnabled(not busy)
+        self.action_cache_size.setEnabled(not busy)  # these reconfigure the connection a running operation uses
+        self.action_async_engine.setEnabled(not busy)
+        self.action_record_format.setEnabled(not busy)
+
+        self.progress_bar.setRange(0, 0)  # busy indicator until the first progress report
+        self.progress_bar.setVisible(busy)
+        self.button_cancel.setEnabled(True)
+        self.button_cancel.setVisible(busy and cancellable)
+
+    def update_progress(self, progress): # shows done/total from a worker progress report
+        if progress.get("total"):
+            self.progress_bar.setRange(0, progress["total"])
+            self.progress_bar.setValue(min(progress["done"], progress["total"]))
 
     def initialize_table(self):
-        self.table.setRowCount(0) # clears the table
-        self.table.setColumnCount(12)
-        self.table.setHorizontalHeaderLabels(['ID', 'First Name', 'Middle Name', 'Last Name', 'Age', 'Title', 'Join Date', 'Department', 'Address 1', 'Address 2', 'Country', 'Misc'])
-        self.table.setSelectionMode(QTableWidget.MultiSelection)
-
-    def populate_table(self, row, id, firstname, middlename, lastname, age, title, joindate, department, address1, address2, country, misc):
-        self.table.insertRow(row)
-        self.table.setItem(row, 0, QTableWidgetItem(str(id)))
-        self.table.setItem(row, 1, QTableWidgetItem(firstname))
-        self.table.setItem(row, 2, QTableWidgetItem(middlename))
-        self.table.setItem(row, 3, QTableWidgetItem(lastname))
-        self.table.setItem(row, 4, QTableWidgetItem(age))
-        self.table.setItem(row, 5, QTableWidgetItem(title))
-        self.table.setItem(row, 6, QTableWidgetItem(joindate))
-        self.table.setItem(row, 7, QTableWidgetItem(department))
-        self.table.setItem(row, 8, QTableWidgetItem(address1))
-        self.table.setItem(row, 9, QTableWidgetItem(address2))
-        self.table.setItem(row, 10, QTableWidgetItem(country))
-        self.table.setItem(row, 11, QTableWidgetItem(misc))
-        self.table.resizeColumnsToContents()
-        self.table.resizeRowsToContents()
+        self.show_model(self.list_model) # clears the table
+        self.table.resizeColumnsToContents()  # header widths only, the table is empty
+        self.table.setSelectionMode(QTableView.MultiSelection)
+
+    def append_to_table(self, records): # adds a batch of person hashes to the table, sizing columns once per batch
+        with self.metrics.timed("table", "append_rows"):
+            self.table_model.append_records(records)
+        with self.metrics.timed("table", "size_columns"):
+            self.size_columns(records)
+
+    def size_columns(self, records): # widens columns to fit a sample of records instead of measuring every row
+        metrics = self.table.fontMetrics()
+        sample = records[::max(1, len(records) // TABLE_SIZE_SAMPLE)]
+        for col, field in enumerate(FIELDS):
+            width = max((metrics.horizontalAdvance(person_data.get(field, "")) for person_data in sample), default=0) + TABLE_CELL_PADDING
+            if width > self.table.columnWidth(col):
+                self.table.setColumnWidth(col, width)
+
+    def selected_rows(self): # returns the selected row numbers in ascending order
+        return sorted(set(index.row() for index in self.table.selectionModel().selectedIndexes()))
 
     def clear_fields(self):
         self.join_date.setDate(QDate.currentDate())
@@ -491,11 +1042,107 @@ class MainWindow(QMainWindow, main_ui): # used to display the main user interfac
         if self.redis_cloud is None:
             self.label_connection.setText("Not connected to RedisCloud")
         else:
-            is_connected = self.redis_cloud.check_connection()
-            if is_connected:
+            if self.redis_cloud.connected and isinstance(self.redis_cloud, ClusterPersonRepository):
+                self.label_connection.setText(f"Connected to RedisCloud (cluster, {len(self.redis_cloud.shards)} shards)")
+            elif self.redis_cloud.connected:
                 self.label_connection.setText("Connected to RedisCloud")
             else:
-                self.label_connection.setText("Failed to connect to RedisCloud")
+                self.label_connection.setText("Lost connection to RedisCloud, reconnecting on the next action")
+
+    def set_batch_size(self): # asks for the number of records fetched per pipelined round trip
+        batch_size, ok = QInputDialog.getInt(self, "Batch Size", "Records per round trip:", self.batch_size, 1, 100000)
+        if not ok:
+            return
+        self.batch_size = batch_size
+        if self.redis_cloud is not None:
+            self.redis_cloud.batch_size = batch_size
+
+    def set_record_format(self): # asks how new writes store a person: full field names, short codes or one packed field
+        record_format, ok = QInputDialog.getItem(self, "Record Format", "Store new and updated records as:", RECORD_FORMATS,
+                                                 RECORD_FORMATS.index(self.record_format), False)
+        if not ok or record_format == self.record_format:
+            return
+        self.record_format = record_format
+        if self.redis_cloud is None:
+            return
+        self.redis_cloud.record_format = record_format
+        reply = QMessageBox.question(self, "Record Format", f"Convert the records already stored to the {record_format} format now?",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+        if reply == QMessageBox.Yes:
+            self.migrate_records()
+
+    def set_save_interval(self): # asks how long edited cells wait before they are written
+        interval, ok = QInputDialog.getInt(self, "Edit Save Interval", "Milliseconds before edited cells are saved (0 saves only on Update):",
+                                           self.save_interval, 0, 600000)
+        if not ok:
+            return
+        self.save_interval = interval
+        self.save_timer.stop()
+        self.pending_edits_changed(self.pending_edits.count())
+
+    def set_cache_size(self): # asks for the number of records kept in the client-side cache
+        cache_size, ok = QInputDialog.getInt(self, "Record Cache", "Records cached locally (0 disables the cache):", self.cache_size, 0, 10000000)
+        if not ok:
+            return
+        self.cache_size = cache_size
+        if self.redis_cloud is not None:
+            self.run_worker(lambda worker: self.redis_cloud.configure_cache(cache_size), on_result=self.cache_configured,
+                            error_message="Failed to configure the record cache", action="configure_cache")
+
+    def set_async_engine(self, checked): # Async Engine is toggled, overlapping the batches of a query, search or import
+        if self.redis_cloud is not None:
+            self.run_worker(lambda worker: self.redis_cloud.configure_async(checked), error_message="Failed to start the async engine",
+                            on_error=self.async_engine_failed, action="configure_async")
+
+    def set_scan_filter(self, checked): # Server-Side Search Filter is toggled, matching names in Lua when a search can't use the index
+        if self.redis_cloud is not None:
+            self.redis_cloud.scan_filter = checked
+
+    def set_cluster_mode(self, checked): # Cluster Mode is toggled, it picks the repository on the next Connect
+        if self.redis_cloud is not None and checked != isinstance(self.redis_cloud, ClusterPersonRepository):
+            self.statusbar.showMessage(f"Cluster mode turns {'on' if checked else 'off'} with the next Connect")
+
+    def async_engine_failed(self, error):
+        self.action_async_engine.setChecked(False)
+        QMessageBox.warning(self, "Async Engine", f"Failed to start the async engine, staying synchronous: {str(error)}")
+
+    def cache_configured(self, result):
+        if self.cache_size > 0 and isinstance(self.redis_cloud, ClusterPersonRepository):
+            QMessageBox.warning(self, "Record Cache", "The record cache is not available in cluster mode, it stays off")
+        elif self.cache_size > 0 and self.redis_cloud.cache is None:
+            QMessageBox.warning(self, "Record Cache", "The server supports neither CLIENT TRACKING nor keyspace notifications, the record cache stays off")
+        else:
+            self.statusbar.showMessage(f"Record cache{self.cache_summary() or ' off'}")
+
+    def cache_summary(self): # ", cache: N hits / M misses" while the record cache is on
+        stats = self.redis_cloud.cache_stats() if self.redis_cloud is not None else None
+        if stats is None:
+            return ""
+        return f", cache: {stats['hits']} hits / {stats['misses']} misses ({stats['size']}/{stats['max_size']} records, {stats['mode']})"
+
+    def update_metrics_summary(self):
+        self.label_metrics.setText(self.metrics.summary())
+
+    def dump_metrics(self): # writes the latency histograms and traffic counters to a JSON file (Tools menu)
+        filename, _ = QFileDialog.getSaveFileName(self, 'Dump Metrics', 'metrics.json', 'JSON File (*.json)')
+        if not filename:
+            return
+
+        self.run_worker(self._dump_metrics_task, filename, on_result=lambda filename: self.statusbar.showMessage(f"Metrics written to {filename}"),
+                        error_message="Failed to dump metrics")
+
+    def _dump_metrics_task(self, worker, filename): # runs on the worker thread
+        report = self.metrics.to_dict()
+        if self.redis_cloud is not None:
+            # Server-side time per command, to tell Redis time apart from network time in the client histograms
+            report["server_commandstats"] = self.redis_cloud.server_command_stats()
+        with open(filename, 'w') as file:
+            json.dump(report, file, indent=2)
+        return filename
+
+    def reset_metrics(self):
+        self.metrics.reset()
+        self.update_metrics_summary()
 
     def dark_mode(self, checked):
         if checked:
@@ -504,38 +1151,17 @@ class MainWindow(QMainWindow, main_ui): # used to display the main user interfac
             self.setStyleSheet('')
 
     def closeEvent(self, event):  # Save settings when closing the app
+        if self.active_worker is not None:
+            self.active_worker.cancel()
+        self.stop_live_sync()
+        self.thread_pool.waitForDone()  # let a running operation reach its next checkpoint
+        self.live_pool.waitForDone()
+        self.save_pending_edits_now()
+        if self.redis_cloud is not None:
+            self.redis_cloud.close()
         self.settings_manager.save_settings()  # Save settings using the manager
         event.accept()
 
-class RedisCloud:
-    def __init__(self, redis_url, redis_port, redis_user, redis_password):
-        try:
-            self.client = redis.Redis(
-                host=redis_url,
-                port=int(redis_port),  # Convert port to integer
-                username=redis_user,
-                password=redis_password,
-                decode_responses=True
-            )
-            # Test the connection immediately
-            self.client.ping()
-            self.connected = True
-        except (redis.ConnectionError, ValueError) as e:
-            self.connected = False
-            raise redis.ConnectionError(f"Connection failed: {str(e)}")
-
-    def get_client(self):
-        return self.client
-    
-    def check_connection(self):
-        try:
-            self.client.ping()
-            self.connected = True
-            return True
-        except redis.ConnectionError:
-            self.connected = False
-            return False
-
 class SettingsManager: # used to load and save settings when opening and closing the app
     def __init__(self, main_window):
         self.main_window = main_window
@@ -563,16 +1189,34 @@ class SettingsManager: # used to load and save settings when opening and closing
     def load_settings(self):
         size = self.settings.value('window_size', None)
         pos = self.settings.value('window_pos', None)
+        state = self.settings.value('window_state', None)
         dark = self.settings.value('dark_mode')
         redis_url = self.settings.value('redis_url')
         redis_port = self.settings.value('redis_port')
         redis_user = self.settings.value('redis_user')
         encrypted_redis_password = self.settings.value('redis_password')
+        batch_size = self.settings.value('batch_size')
+        streaming_load = self.settings.value('streaming_load')
+        virtual_scrolling = self.settings.value('virtual_scrolling')
+        live_sync = self.settings.value('live_sync')
+        scan_filter = self.settings.value('scan_filter')
+        cluster_mode = self.settings.value('cluster_mode')
+        async_engine = self.settings.value('async_engine')
+        cache_size = self.settings.value('cache_size')
+        record_format = self.settings.value('record_format')
+        import_writers = self.settings.value('import_writers')
+        save_interval = self.settings.value('save_interval')
+        for option, default in PersonRepository.DEFAULT_CONNECTION_OPTIONS.items():
+            value = self.settings.value(f'connection/{option}')
+            if value is not None:
+                self.main_window.connection_options[option] = type(default)(value)
         
         if size is not None:
             self.main_window.resize(size)
         if pos is not None:
             self.main_window.move(pos)
+        if state is not None:
+            self.main_window.restoreState(state)  # dock placement and visibility
         if dark == 'true':
             self.main_window.action_dark_mode.setChecked(True)
             self.main_window.setStyleSheet(qdarkstyle.load_stylesheet_pyside6())
@@ -588,14 +1232,50 @@ class SettingsManager: # used to load and save settings when opening and closing
                 self.main_window.line_redis_password.setText(redis_password)
             else:
                 self.main_window.line_redis_password.setText("")
+        if batch_size is not None:
+            self.main_window.batch_size = int(batch_size)
+        if streaming_load is not None:
+            self.main_window.action_streaming_load.setChecked(streaming_load == 'true')
+        if virtual_scrolling is not None:
+            self.main_window.action_virtual_scrolling.setChecked(virtual_scrolling == 'true')
+        if live_sync is not None:
+            self.main_window.action_live_sync.setChecked(live_sync == 'true')
+        if scan_filter is not None:
+            self.main_window.action_scan_filter.setChecked(scan_filter == 'true')
+        if cluster_mode is not None:
+            self.main_window.action_cluster_mode.setChecked(cluster_mode == 'true')
+        if async_engine is not None:
+            self.main_window.action_async_engine.setChecked(async_engine == 'true')
+        if cache_size is not None:
+            self.main_window.cache_size = int(cache_size)
+        if record_format in RECORD_FORMATS:
+            self.main_window.record_format = record_format
+        if import_writers is not None:
+            self.main_window.import_writers = int(import_writers)
+        if save_interval is not None:
+            self.main_window.save_interval = int(save_interval)
 
     def save_settings(self):
         self.settings.setValue('window_size', self.main_window.size())
         self.settings.setValue('window_pos', self.main_window.pos())
+        self.settings.setValue('window_state', self.main_window.saveState())
         self.settings.setValue('dark_mode', self.main_window.action_dark_mode.isChecked())
         self.settings.setValue('redis_url', self.main_window.line_redis_url.text())
         self.settings.setValue('redis_port', self.main_window.line_redis_port.text())
         self.settings.setValue('redis_user', self.main_window.line_redis_user.text())
+        self.settings.setValue('batch_size', self.main_window.batch_size)
+        self.settings.setValue('streaming_load', self.main_window.action_streaming_load.isChecked())
+        self.settings.setValue('virtual_scrolling', self.main_window.action_virtual_scrolling.isChecked())
+        self.settings.setValue('live_sync', self.main_window.action_live_sync.isChecked())
+        self.settings.setValue('scan_filter', self.main_window.action_scan_filter.isChecked())
+        self.settings.setValue('cluster_mode', self.main_window.action_cluster_mode.isChecked())
+        self.settings.setValue('async_engine', self.main_window.action_async_engine.isChecked())
+        self.settings.setValue('cache_size', self.main_window.cache_size)
+        self.settings.setValue('record_format', self.main_window.record_format)
+        self.settings.setValue('import_writers', self.main_window.import_writers)
+        self.settings.setValue('save_interval', self.main_window.save_interval)
+        for option, value in self.main_window.connection_options.items():
+            self.settings.setValue(f'connection/{option}', value)
 
         redis_password = self.main_window.line_redis_password.text()
         self.settings.setValue('redis_password', self.encrypt_text(redis_password))
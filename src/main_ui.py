@@ -16,11 +16,11 @@ from PySide6.QtGui import (QAction, QBrush, QColor, QConicalGradient,
     QIcon, QImage, QKeySequence, QLinearGradient,
     QPainter, QPalette, QPixmap, QRadialGradient,
     QTransform)
-from PySide6.QtWidgets import (QApplication, QComboBox, QDateEdit, QGroupBox,
-    QHBoxLayout, QHeaderView, QLabel, QLineEdit,
+from PySide6.QtWidgets import (QApplication, QComboBox, QDateEdit, QDockWidget, QGroupBox,
+    QHBoxLayout, QHeaderView, QLabel, QLineEdit, QListWidget,
     QMainWindow, QMenu, QMenuBar, QPushButton,
-    QSizePolicy, QSpacerItem, QStatusBar, QTableWidget,
-    QTableWidgetItem, QVBoxLayout, QWidget)
+    QSizePolicy, QSpacerItem, QStatusBar, QTableView,
+    QVBoxLayout, QWidget)
 import resources_rc
 
 class Ui_MainWindow(object):
@@ -44,6 +44,48 @@ class Ui_MainWindow(object):
         self.action_dark_mode = QAction(MainWindow)
         self.action_dark_mode.setObjectName(u"action_dark_mode")
         self.action_dark_mode.setCheckable(True)
+        self.action_batch_size = QAction(MainWindow)
+        self.action_batch_size.setObjectName(u"action_batch_size")
+        self.action_streaming_load = QAction(MainWindow)
+        self.action_streaming_load.setObjectName(u"action_streaming_load")
+        self.action_streaming_load.setCheckable(True)
+        self.action_streaming_load.setChecked(True)
+        self.action_async_engine = QAction(MainWindow)
+        self.action_async_engine.setObjectName(u"action_async_engine")
+        self.action_async_engine.setCheckable(True)
+        self.action_scan_filter = QAction(MainWindow)
+        self.action_scan_filter.setObjectName(u"action_scan_filter")
+        self.action_scan_filter.setCheckable(True)
+        self.action_scan_filter.setChecked(True)
+        self.action_virtual_scrolling = QAction(MainWindow)
+        self.action_virtual_scrolling.setObjectName(u"action_virtual_scrolling")
+        self.action_virtual_scrolling.setCheckable(True)
+        self.action_cluster_mode = QAction(MainWindow)
+        self.action_cluster_mode.setObjectName(u"action_cluster_mode")
+        self.action_cluster_mode.setCheckable(True)
+        self.action_live_sync = QAction(MainWindow)
+        self.action_live_sync.setObjectName(u"action_live_sync")
+        self.action_live_sync.setCheckable(True)
+        self.action_record_format = QAction(MainWindow)
+        self.action_record_format.setObjectName(u"action_record_format")
+        self.action_migrate_records = QAction(MainWindow)
+        self.action_migrate_records.setObjectName(u"action_migrate_records")
+        self.action_cache_size = QAction(MainWindow)
+        self.action_cache_size.setObjectName(u"action_cache_size")
+        self.action_save_interval = QAction(MainWindow)
+        self.action_save_interval.setObjectName(u"action_save_interval")
+        self.action_delete_matching = QAction(MainWindow)
+        self.action_delete_matching.setObjectName(u"action_delete_matching")
+        self.action_rebuild_search_index = QAction(MainWindow)
+        self.action_rebuild_search_index.setObjectName(u"action_rebuild_search_index")
+        self.action_import_files = QAction(MainWindow)
+        self.action_import_files.setObjectName(u"action_import_files")
+        self.action_export_all = QAction(MainWindow)
+        self.action_export_all.setObjectName(u"action_export_all")
+        self.action_dump_metrics = QAction(MainWindow)
+        self.action_dump_metrics.setObjectName(u"action_dump_metrics")
+        self.action_reset_metrics = QAction(MainWindow)
+        self.action_reset_metrics.setObjectName(u"action_reset_metrics")
         self.centralwidget = QWidget(MainWindow)
         self.centralwidget.setObjectName(u"centralwidget")
         self.verticalLayout_5 = QVBoxLayout(self.centralwidget)
@@ -268,6 +310,14 @@ class Ui_MainWindow(object):
 
         self.horizontalLayout_3.addWidget(self.button_query)
 
+        self.button_refresh = QPushButton(self.centralwidget)
+        self.button_refresh.setObjectName(u"button_refresh")
+        sizePolicy1.setHeightForWidth(self.button_refresh.sizePolicy().hasHeightForWidth())
+        self.button_refresh.setSizePolicy(sizePolicy1)
+        self.button_refresh.setMinimumSize(QSize(100, 0))
+
+        self.horizontalLayout_3.addWidget(self.button_refresh)
+
         self.horizontalSpacer = QSpacerItem(40, 20, QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Minimum)
 
         self.horizontalLayout_3.addItem(self.horizontalSpacer)
@@ -297,6 +347,31 @@ class Ui_MainWindow(object):
 
         self.verticalLayout.addLayout(self.horizontalLayout_5)
 
+        self.horizontalLayout_range = QHBoxLayout()
+        self.horizontalLayout_range.setObjectName(u"horizontalLayout_range")
+        self.line_age_min = QLineEdit(self.groupBox_3)
+        self.line_age_min.setObjectName(u"line_age_min")
+
+        self.horizontalLayout_range.addWidget(self.line_age_min)
+
+        self.line_age_max = QLineEdit(self.groupBox_3)
+        self.line_age_max.setObjectName(u"line_age_max")
+
+        self.horizontalLayout_range.addWidget(self.line_age_max)
+
+        self.line_joined_from = QLineEdit(self.groupBox_3)
+        self.line_joined_from.setObjectName(u"line_joined_from")
+
+        self.horizontalLayout_range.addWidget(self.line_joined_from)
+
+        self.line_joined_to = QLineEdit(self.groupBox_3)
+        self.line_joined_to.setObjectName(u"line_joined_to")
+
+        self.horizontalLayout_range.addWidget(self.line_joined_to)
+
+
+        self.verticalLayout.addLayout(self.horizontalLayout_range)
+
         self.horizontalLayout_6 = QHBoxLayout()
         self.horizontalLayout_6.setObjectName(u"horizontalLayout_6")
         self.button_search = QPushButton(self.groupBox_3)
@@ -333,9 +408,8 @@ class Ui_MainWindow(object):
 
         self.verticalLayout_5.addWidget(self.groupBox_3)
 
-        self.table = QTableWidget(self.centralwidget)
+        self.table = QTableView(self.centralwidget)
         self.table.setObjectName(u"table")
-        self.table.setRowCount(0)
         self.table.verticalHeader().setVisible(False)
 
         self.verticalLayout_5.addWidget(self.table)
@@ -353,10 +427,40 @@ class Ui_MainWindow(object):
         self.menuHelp.setObjectName(u"menuHelp")
         self.menuSettings = QMenu(self.menubar)
         self.menuSettings.setObjectName(u"menuSettings")
+        self.menuTools = QMenu(self.menubar)
+        self.menuTools.setObjectName(u"menuTools")
         MainWindow.setMenuBar(self.menubar)
         self.statusbar = QStatusBar(MainWindow)
         self.statusbar.setObjectName(u"statusbar")
         MainWindow.setStatusBar(self.statusbar)
+        self.dock_facets = QDockWidget(MainWindow)
+        self.dock_facets.setObjectName(u"dock_facets")
+        self.dockWidgetContents_facets = QWidget()
+        self.dockWidgetContents_facets.setObjectName(u"dockWidgetContents_facets")
+        self.verticalLayout_facets = QVBoxLayout(self.dockWidgetContents_facets)
+        self.verticalLayout_facets.setObjectName(u"verticalLayout_facets")
+        self.label_department_facet = QLabel(self.dockWidgetContents_facets)
+        self.label_department_facet.setObjectName(u"label_department_facet")
+
+        self.verticalLayout_facets.addWidget(self.label_department_facet)
+
+        self.list_department_facet = QListWidget(self.dockWidgetContents_facets)
+        self.list_department_facet.setObjectName(u"list_department_facet")
+
+        self.verticalLayout_facets.addWidget(self.list_department_facet)
+
+        self.label_country_facet = QLabel(self.dockWidgetContents_facets)
+        self.label_country_facet.setObjectName(u"label_country_facet")
+
+        self.verticalLayout_facets.addWidget(self.label_country_facet)
+
+        self.list_country_facet = QListWidget(self.dockWidgetContents_facets)
+        self.list_country_facet.setObjectName(u"list_country_facet")
+
+        self.verticalLayout_facets.addWidget(self.list_country_facet)
+
+        self.dock_facets.setWidget(self.dockWidgetContents_facets)
+        MainWindow.addDockWidget(Qt.LeftDockWidgetArea, self.dock_facets)
         QWidget.setTabOrder(self.line_redis_url, self.line_redis_port)
         QWidget.setTabOrder(self.line_redis_port, self.line_redis_user)
         QWidget.setTabOrder(self.line_redis_user, self.line_redis_password)
@@ -376,18 +480,43 @@ class Ui_MainWindow(object):
         QWidget.setTabOrder(self.button_send, self.button_update)
         QWidget.setTabOrder(self.button_update, self.button_delete)
         QWidget.setTabOrder(self.button_delete, self.button_query)
-        QWidget.setTabOrder(self.button_query, self.line_firstname_search)
+        QWidget.setTabOrder(self.button_query, self.button_refresh)
+        QWidget.setTabOrder(self.button_refresh, self.line_firstname_search)
         QWidget.setTabOrder(self.line_firstname_search, self.line_lastname_search)
-        QWidget.setTabOrder(self.line_lastname_search, self.button_search)
+        QWidget.setTabOrder(self.line_lastname_search, self.line_age_min)
+        QWidget.setTabOrder(self.line_age_min, self.line_age_max)
+        QWidget.setTabOrder(self.line_age_max, self.line_joined_from)
+        QWidget.setTabOrder(self.line_joined_from, self.line_joined_to)
+        QWidget.setTabOrder(self.line_joined_to, self.button_search)
         QWidget.setTabOrder(self.button_search, self.button_import_csv)
         QWidget.setTabOrder(self.button_import_csv, self.button_export_csv)
         QWidget.setTabOrder(self.button_export_csv, self.table)
 
         self.menubar.addAction(self.menuSettings.menuAction())
+        self.menubar.addAction(self.menuTools.menuAction())
         self.menubar.addAction(self.menuHelp.menuAction())
         self.menuHelp.addAction(self.action_about)
         self.menuHelp.addAction(self.action_about_qt)
         self.menuSettings.addAction(self.action_dark_mode)
+        self.menuSettings.addAction(self.action_batch_size)
+        self.menuSettings.addAction(self.action_cluster_mode)
+        self.menuSettings.addAction(self.action_streaming_load)
+        self.menuSettings.addAction(self.action_async_engine)
+        self.menuSettings.addAction(self.action_scan_filter)
+        self.menuSettings.addAction(self.action_virtual_scrolling)
+        self.menuSettings.addAction(self.action_live_sync)
+        self.menuSettings.addAction(self.action_record_format)
+        self.menuSettings.addAction(self.action_cache_size)
+        self.menuSettings.addAction(self.action_save_interval)
+        self.menuSettings.addAction(self.dock_facets.toggleViewAction())
+        self.menuTools.addAction(self.action_import_files)
+        self.menuTools.addAction(self.action_export_all)
+        self.menuTools.addAction(self.action_delete_matching)
+        self.menuTools.addAction(self.action_rebuild_search_index)
+        self.menuTools.addAction(self.action_migrate_records)
+        self.menuTools.addSeparator()
+        self.menuTools.addAction(self.action_dump_metrics)
+        self.menuTools.addAction(self.action_reset_metrics)
 
         self.retranslateUi(MainWindow)
 
@@ -399,6 +528,23 @@ class Ui_MainWindow(object):
         self.action_about.setText(QCoreApplication.translate("MainWindow", u"About", None))
         self.action_about_qt.setText(QCoreApplication.translate("MainWindow", u"About Qt", None))
         self.action_dark_mode.setText(QCoreApplication.translate("MainWindow", u"Dark Mode", None))
+        self.action_batch_size.setText(QCoreApplication.translate("MainWindow", u"Batch Size...", None))
+        self.action_streaming_load.setText(QCoreApplication.translate("MainWindow", u"Streaming Load", None))
+        self.action_async_engine.setText(QCoreApplication.translate("MainWindow", u"Async Engine", None))
+        self.action_virtual_scrolling.setText(QCoreApplication.translate("MainWindow", u"Virtual Scrolling", None))
+        self.action_scan_filter.setText(QCoreApplication.translate("MainWindow", u"Server-Side Search Filter", None))
+        self.action_cluster_mode.setText(QCoreApplication.translate("MainWindow", u"Cluster Mode", None))
+        self.action_live_sync.setText(QCoreApplication.translate("MainWindow", u"Live Sync", None))
+        self.action_record_format.setText(QCoreApplication.translate("MainWindow", u"Record Format...", None))
+        self.action_migrate_records.setText(QCoreApplication.translate("MainWindow", u"Convert Records to Record Format", None))
+        self.action_cache_size.setText(QCoreApplication.translate("MainWindow", u"Record Cache Size...", None))
+        self.action_save_interval.setText(QCoreApplication.translate("MainWindow", u"Edit Save Interval...", None))
+        self.action_delete_matching.setText(QCoreApplication.translate("MainWindow", u"Delete All Matching Search...", None))
+        self.action_rebuild_search_index.setText(QCoreApplication.translate("MainWindow", u"Rebuild Search Index", None))
+        self.action_import_files.setText(QCoreApplication.translate("MainWindow", u"Import CSV Files...", None))
+        self.action_export_all.setText(QCoreApplication.translate("MainWindow", u"Export All from Redis...", None))
+        self.action_dump_metrics.setText(QCoreApplication.translate("MainWindow", u"Dump Metrics to JSON...", None))
+        self.action_reset_metrics.setText(QCoreApplication.translate("MainWindow", u"Reset Metrics", None))
         self.groupBox_2.setTitle(QCoreApplication.translate("MainWindow", u"Server Info", None))
         self.line_redis_url.setText("")
         self.line_redis_url.setPlaceholderText(QCoreApplication.translate("MainWindow", u"Redis URL", None))
@@ -438,9 +584,20 @@ class Ui_MainWindow(object):
         self.button_query.setStatusTip(QCoreApplication.translate("MainWindow", u"Query RedisCloud", None))
 #endif // QT_CONFIG(statustip)
         self.button_query.setText(QCoreApplication.translate("MainWindow", u"Query DB", None))
+#if QT_CONFIG(statustip)
+        self.button_refresh.setStatusTip(QCoreApplication.translate("MainWindow", u"Apply the changes made since the last query", None))
+#endif // QT_CONFIG(statustip)
+        self.button_refresh.setText(QCoreApplication.translate("MainWindow", u"Refresh", None))
         self.groupBox_3.setTitle(QCoreApplication.translate("MainWindow", u"Search", None))
+        self.dock_facets.setWindowTitle(QCoreApplication.translate("MainWindow", u"Facets", None))
+        self.label_department_facet.setText(QCoreApplication.translate("MainWindow", u"Department", None))
+        self.label_country_facet.setText(QCoreApplication.translate("MainWindow", u"Country", None))
         self.line_firstname_search.setPlaceholderText(QCoreApplication.translate("MainWindow", u"Search First Name", None))
         self.line_lastname_search.setPlaceholderText(QCoreApplication.translate("MainWindow", u"Search Last Name", None))
+        self.line_age_min.setPlaceholderText(QCoreApplication.translate("MainWindow", u"Age From", None))
+        self.line_age_max.setPlaceholderText(QCoreApplication.translate("MainWindow", u"Age To", None))
+        self.line_joined_from.setPlaceholderText(QCoreApplication.translate("MainWindow", u"Joined From (yyyy or MM-dd-yyyy)", None))
+        self.line_joined_to.setPlaceholderText(QCoreApplication.translate("MainWindow", u"Joined To (yyyy or MM-dd-yyyy)", None))
 #if QT_CONFIG(statustip)
         self.button_search.setStatusTip(QCoreApplication.translate("MainWindow", u"Search MongoDB", None))
 #endif // QT_CONFIG(statustip)
@@ -456,5 +613,6 @@ class Ui_MainWindow(object):
         self.label_connection.setText(QCoreApplication.translate("MainWindow", u"RedisCloud Connection Status Label", None))
         self.menuHelp.setTitle(QCoreApplication.translate("MainWindow", u"Help", None))
         self.menuSettings.setTitle(QCoreApplication.translate("MainWindow", u"Settings", None))
+        self.menuTools.setTitle(QCoreApplication.translate("MainWindow", u"Tools", None))
     # retranslateUi
 
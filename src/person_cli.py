@@ -0,0 +1,161 @@
+"""Command-line access to the person records, for bulk jobs that shouldn't drive the desktop UI.
+
+    python src/person_cli.py --host redis.example.com --port 12345 --user default import people.csv more.csv
+    python src/person_cli.py import --parallel --writers 8 dumps/*.csv
+    python src/person_cli.py export all.csv
+    python src/person_cli.py query --first ann --format jsonl
+    python src/person_cli.py query --age-min 30 --age-max 40 --joined-from 2023 --joined-to 2023
+    python src/person_cli.py query --department Engineering --country US
+    python src/person_cli.py --record-format packed migrate
+    python src/person_cli.py --cluster --port 7000 import --parallel dumps/*.csv
+
+The password is read from --password or the REDIS_PASSWORD environment variable.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import redis
+from bulk_import import ParallelImport, DEFAULT_WRITERS
+from cluster_repository import ClusterPersonRepository
+from person_repository import PersonRepository, CsvFormatError, read_people_csv, write_people_csv, join_date_bound, RECORD_FORMATS
+
+def connect(args):
+    repository_class = ClusterPersonRepository if args.cluster else PersonRepository
+    return repository_class(args.host, args.port, args.user, args.password, batch_size=args.batch_size,
+                            connection_options={"db": args.db, "cluster_shards": args.shards}, record_format=args.record_format)
+
+def import_files(repository, args): # writes every row of the given CSV files, one MULTI/EXEC per batch
+    if args.parallel:
+        import_parallel(repository, args)
+        return
+    start = time.perf_counter()
+    imported = 0
+    for filename in args.files:
+        with open(filename, 'r', newline='') as file:
+            for chunk in repository.put_stream(read_people_csv(file)):
+                imported += len(chunk)
+                if not args.quiet:
+                    print(f"\r{filename}: {imported} imported", end="", file=sys.stderr)
+        if not args.quiet:
+            print(file=sys.stderr)
+    seconds = time.perf_counter() - start
+    print(f"Imported {imported} record(s) in {seconds:.1f}s ({imported / seconds if seconds else 0:.0f} rows/s)", file=sys.stderr)
+
+def import_parallel(repository, args): # parses the files in a process pool and writes with several connections, then reports per file
+    start = time.perf_counter()
+    job = ParallelImport(repository, args.files, processes=args.processes, writers=args.writers)
+    for progress in job.run():
+        if not args.quiet:
+            print(f"\r{progress['imported']} imported, {100 * progress['done'] // max(progress['total'], 1)}% parsed", end="", file=sys.stderr)
+    if not args.quiet:
+        print(file=sys.stderr)
+    seconds = time.perf_counter() - start
+    for filename, file in progress["files"].items():
+        print(f"{filename}: {'failed, ' + file['error'] if file['error'] is not None else str(file['rows']) + ' row(s)'}", file=sys.stderr)
+    print(f"Imported {progress['imported']} record(s) in {seconds:.1f}s ({progress['imported'] / seconds if seconds else 0:.0f} rows/s)", file=sys.stderr)
+    if any(file["error"] is not None for file in progress["files"].values()):
+        sys.exit(1)
+
+def export_file(repository, args): # streams every stored person to a CSV file, one page in memory at a time
+    total = repository.count()
+    with open(args.file, 'w', newline='') as file:
+        exported = 0
+        for exported in write_people_csv(file, (records for records, stats in repository.iter_all(dedupe=False))):
+            if not args.quiet:
+                print(f"\r{exported} of {total} exported", end="", file=sys.stderr)
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(f"Exported {exported} record(s) to {args.file}", file=sys.stderr)
+
+def joined_to(text): # upper join date bound, a year covers all of it
+    return join_date_bound(text, upper=True)
+
+def query(repository, args): # prints the people matching --first/--last, the ranges and the facets (everyone without them) as CSV or JSON lines
+    ranges = {}
+    if args.age_min is not None or args.age_max is not None:
+        ranges["Age"] = (args.age_min, args.age_max)
+    if args.joined_from is not None or args.joined_to is not None:
+        ranges["Join Date"] = (args.joined_from, args.joined_to)
+    facets = {field: value for field, value in (("Department", args.department), ("Country", args.country)) if value}
+
+    if args.first or args.last or ranges or facets:
+        pages = (records for records, stats in repository.search(args.first, args.last, ranges=ranges, facets=facets))
+    else:
+        pages = (records for records, stats in repository.iter_all())
+
+    if args.format == "csv":
+        for rows in write_people_csv(sys.stdout, pages):
+            pass
+    else:
+        for records in pages:
+            for person_data in records:
+                print(json.dumps(person_data))
+
+def migrate(repository, args): # rewrites stored records in --record-format and reports memory per record before and after
+    before = repository.record_bytes()
+    total = repository.count()
+    checked = 0
+    for checked in repository.migrate_records():
+        if not args.quiet:
+            print(f"\r{checked} of {total} checked", end="", file=sys.stderr)
+    if not args.quiet:
+        print(file=sys.stderr)
+    print(json.dumps({"records": checked, "record_format": args.record_format, "before": before, "after": repository.record_bytes()}))
+
+def main():
+    parser = argparse.ArgumentParser(description="Import, export and query person records in Redis without the GUI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--user", default="")
+    parser.add_argument("--password", default=os.environ.get("REDIS_PASSWORD", ""))
+    parser.add_argument("--db", type=int, default=PersonRepository.DEFAULT_CONNECTION_OPTIONS["db"])
+    parser.add_argument("--cluster", action="store_true", help="--host/--port is a node of a Redis Cluster, people are spread over hash-tagged shards")
+    parser.add_argument("--shards", type=int, default=PersonRepository.DEFAULT_CONNECTION_OPTIONS["cluster_shards"],
+                        help="shards for --cluster, only used by the first client to write to the cluster")
+    parser.add_argument("--batch-size", type=int, default=PersonRepository.DEFAULT_BATCH_SIZE, help="records per pipelined round trip")
+    parser.add_argument("--record-format", choices=RECORD_FORMATS, default=PersonRepository.DEFAULT_RECORD_FORMAT, help="how written records are stored")
+    parser.add_argument("--quiet", action="store_true", help="don't print progress")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = commands.add_parser("import", help="import exported CSV files")
+    import_parser.add_argument("files", nargs="+")
+    import_parser.add_argument("--parallel", action="store_true", help="parse in a process pool and write with several connections")
+    import_parser.add_argument("--processes", type=int, help="parser processes for --parallel, one per core by default")
+    import_parser.add_argument("--writers", type=int, default=DEFAULT_WRITERS, help="connections writing at once with --parallel")
+    import_parser.set_defaults(run=import_files)
+
+    export_parser = commands.add_parser("export", help="export every record to a CSV file")
+    export_parser.add_argument("file")
+    export_parser.set_defaults(run=export_file)
+
+    query_parser = commands.add_parser("query", help="print records, filtered by name if given")
+    query_parser.add_argument("--first", default="", help="part of the first name")
+    query_parser.add_argument("--last", default="", help="part of the last name")
+    query_parser.add_argument("--age-min", type=float)
+    query_parser.add_argument("--age-max", type=float)
+    query_parser.add_argument("--joined-from", type=join_date_bound, help="yyyy or MM-dd-yyyy")
+    query_parser.add_argument("--joined-to", type=joined_to, help="yyyy or MM-dd-yyyy, a year includes all of it")
+    query_parser.add_argument("--department", help="exact department")
+    query_parser.add_argument("--country", help="exact country")
+    query_parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    query_parser.set_defaults(run=query)
+
+    migrate_parser = commands.add_parser("migrate", help="convert stored records to --record-format")
+    migrate_parser.set_defaults(run=migrate)
+
+    args = parser.parse_args()
+    try:
+        repository = connect(args)
+        try:
+            args.run(repository, args)
+        finally:
+            repository.close()
+    except CsvFormatError as e:
+        sys.exit(f"CSV format error: {e}")
+    except (FileNotFoundError, redis.RedisError) as e:
+        sys.exit(str(e))
+
+if __name__ == "__main__":
+    main()
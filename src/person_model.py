@@ -0,0 +1,338 @@
+import sys
+from itertools import compress
+from collections import OrderedDict
+from PySide6.QtCore import Qt, QObject, QAbstractTableModel, QModelIndex, Signal
+from PySide6.QtGui import QFont
+from person_repository import COLUMNS, FIELDS, VERSION_FIELD
+INTERNED_COLUMNS = {COLUMNS.index('Title'), COLUMNS.index('Join Date'), COLUMNS.index('Department'), COLUMNS.index('Country')}  # low-cardinality values share one string object
+PAGE_SIZE = 200  # rows fetched per round trip by PagedPersonModel
+MAX_PAGES = 50  # pages PagedPersonModel keeps, the least recently shown ones are evicted first
+MAX_REMOVED_RANGES = 8  # contiguous ranges PersonTableModel removes in place, more are one rebuild of the columns
+
+class PendingEdits(QObject): # cells edited in the table but not written yet, shared by both table models so edits outlive reloads
+    changed = Signal(int)  # number of pending cells
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.people = {}  # person id -> {field: edited value}
+        self.versions = {}  # person id -> version the row had when it was first edited, the save only succeeds if it is still stored
+        self.font = QFont()  # pending cells are drawn in italics
+        self.font.setItalic(True)
+
+    def count(self):
+        return sum(len(fields) for fields in self.people.values())
+
+    def set(self, person_id, field, value, version):
+        self.people.setdefault(person_id, {})[field] = value
+        self.versions.setdefault(person_id, version)
+        self.changed.emit(self.count())
+
+    def is_pending(self, person_id, field):
+        fields = self.people.get(person_id)
+        return fields is not None and field in fields
+
+    def overlay(self, person_data): # a fetched person hash with its pending edits on top, so a reload doesn't show stale cells
+        fields = self.people.get(person_data.get("_id"))
+        return dict(person_data, **fields) if fields else person_data
+
+    def ready(self): # (edits, base versions) of the rows already stored, a row still being sent has no version to save over yet
+        versions = {person_id: version for person_id, version in self.versions.items() if version is not None}
+        return {person_id: self.people[person_id] for person_id in versions}, versions
+
+    def take(self, person_ids=None): # hands the pending edits of person_ids (default all) and their base versions to a writer
+        if person_ids is None:
+            people, self.people = self.people, {}
+            versions, self.versions = self.versions, {}
+        else:
+            people = {person_id: self.people.pop(person_id) for person_id in person_ids}
+            versions = {person_id: self.versions.pop(person_id) for person_id in person_ids}
+        self.changed.emit(self.count())
+        return people, versions
+
+    def restore(self, people, versions): # puts back edits whose write failed, cells edited again since then keep the newer value
+        for person_id, fields in people.items():
+            self.people[person_id] = dict(fields, **self.people.get(person_id, {}))
+            self.versions[person_id] = versions[person_id]  # still based on what was loaded
+        self.changed.emit(self.count())
+
+    def rebase(self, sent_versions, new_versions): # cells edited while their row was being saved build on that save, not on a conflict with it
+        for person_id, version in new_versions.items():
+            if person_id in self.versions and self.versions[person_id] == sent_versions.get(person_id):
+                self.versions[person_id] = version
+
+    def discard(self, person_ids):
+        for person_id in person_ids:
+            self.people.pop(person_id, None)
+            self.versions.pop(person_id, None)
+        self.changed.emit(self.count())
+
+class PersonTableModel(QAbstractTableModel): # column-oriented store of person records behind the table view
+    def __init__(self, edits, parent=None):
+        super().__init__(parent)
+        self.edits = edits  # PendingEdits, setData records every changed cell there
+        self.columns = [[] for _ in COLUMNS]  # one list of strings per column, row n is columns[c][n]
+        self.versions = []  # stored version of each row, the base of an edit
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns[0])
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid() and role in (Qt.DisplayRole, Qt.EditRole):
+            return self.columns[index.column()][index.row()]
+        if index.isValid() and role == Qt.FontRole and self.edits.people and self.edits.is_pending(self.columns[0][index.row()], FIELDS[index.column()]):
+            return self.edits.font
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUMNS[section]
+        return None
+
+    def flags(self, index):
+        flags = Qt.ItemIsSelectable | Qt.ItemIsEnabled
+        if index.column() != 0:  # the ID is the Redis key and cannot be edited
+            flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        value = str(value)
+        column = self.columns[index.column()]
+        if column[index.row()] == value:
+            return True  # opening and closing the editor isn't an edit
+        column[index.row()] = value
+        self.edits.set(self.columns[0][index.row()], FIELDS[index.column()], value, self.versions[index.row()])
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole, Qt.FontRole])
+        return True
+
+    def append_records(self, records): # appends a batch of person hashes with a single row insertion
+        if not records:
+            return
+        if self.edits.people:
+            records = [self.edits.overlay(person_data) for person_data in records]
+        first = self.rowCount()
+        self.beginInsertRows(QModelIndex(), first, first + len(records) - 1)
+        for col, (field, column) in enumerate(zip(FIELDS, self.columns)):
+            if col in INTERNED_COLUMNS:
+                column.extend(sys.intern(person_data.get(field, "")) for person_data in records)
+            else:
+                column.extend(person_data.get(field, "") for person_data in records)
+        self.versions.extend(_version(person_data) for person_data in records)
+        self.endInsertRows()
+
+    def apply_changes(self, records, deleted_ids): # patches changed people in place, appends new ones and drops deleted ones, returns (updated, added, removed)
+        rows = {person_id: row for row, person_id in enumerate(self.columns[0])}
+        added = []
+        updated = []
+        for person_data in records:
+            row = rows.get(person_data["_id"])
+            if row is None:
+                added.append(person_data)
+                continue
+            person_data = self.edits.overlay(person_data)  # a newer write from elsewhere doesn't undo an unsaved edit
+            for col, (field, column) in enumerate(zip(FIELDS, self.columns)):
+                value = person_data.get(field, "")
+                column[row] = sys.intern(value) if col in INTERNED_COLUMNS else value
+            self.versions[row] = _version(person_data)
+            updated.append(row)
+        if updated:
+            self.dataChanged.emit(self.index(min(updated), 0), self.index(max(updated), len(COLUMNS) - 1), [Qt.DisplayRole, Qt.EditRole, Qt.FontRole])
+
+        removed = [rows[person_id] for person_id in set(deleted_ids) if person_id in rows]
+        self.remove_rows(removed)
+        self.append_records(added)
+        return len(updated), len(added), len(removed)
+
+    def remove_rows(self, rows): # removes the given rows, one model update per contiguous range when there are few
+        ranges = _ranges(rows)
+        if len(ranges) > MAX_REMOVED_RANGES:
+            removed = set(rows)  # scattered rows: copy the kept ones once instead of shifting every column per range
+            keep = [row not in removed for row in range(self.rowCount())]
+            self.beginResetModel()
+            self.columns = [list(compress(column, keep)) for column in self.columns]
+            self.versions = list(compress(self.versions, keep))
+            self.endResetModel()
+            return
+        for first, last in reversed(ranges):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            for column in self.columns:
+                del column[first:last + 1]
+            del self.versions[first:last + 1]
+            self.endRemoveRows()
+
+    def set_versions(self, versions): # records the versions a save of the edited rows left them at
+        for person_id, version in versions.items():
+            try:
+                self.versions[self.columns[0].index(person_id)] = version
+            except ValueError:
+                pass  # removed meanwhile
+
+    def clear(self):
+        self.beginResetModel()
+        self.columns = [[] for _ in COLUMNS]
+        self.versions = []
+        self.endResetModel()
+
+    def record(self, row): # returns a row as a person hash
+        return {field: column[row] for field, column in zip(FIELDS, self.columns)}
+
+    def rows(self): # iterates over every row as a list of column values
+        return zip(*self.columns)
+
+class PagedPersonModel(QAbstractTableModel): # rows of the server's order index, fetched a page at a time as they come into view
+    def __init__(self, request_page, edits, parent=None):
+        super().__init__(parent)
+        self.request_page = request_page  # request_page(page, generation) fetches in the background and answers with set_page
+        self.edits = edits  # PendingEdits, laid over every fetched page so evicting an edited page loses nothing
+        self.total = 0
+        self.pages = OrderedDict()  # page number -> list of person hashes, least recently shown first
+        self.pending = set()  # pages requested but not answered yet
+        self.failed = set()  # pages whose fetch failed, not retried until the next reset
+        self.generation = 0  # bumped on reset so pages fetched for an older view are dropped
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.total
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if index.isValid() and role in (Qt.DisplayRole, Qt.EditRole):
+            person_data = self._loaded(index.row())
+            return person_data.get(FIELDS[index.column()], "") if person_data is not None else ""
+        if index.isValid() and role == Qt.FontRole and self.edits.people:
+            person_data = self._loaded(index.row())
+            if person_data is not None and self.edits.is_pending(person_data["_id"], FIELDS[index.column()]):
+                return self.edits.font
+        return None
+
+    headerData = PersonTableModel.headerData
+    flags = PersonTableModel.flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole:
+            return False
+        person_data = self._loaded(index.row())
+        if person_data is None:
+            return False
+        value = str(value)
+        if person_data.get(FIELDS[index.column()], "") == value:
+            return True
+        person_data[FIELDS[index.column()]] = value
+        self.edits.set(person_data["_id"], FIELDS[index.column()], value, person_data.get(VERSION_FIELD, "0"))
+        self.dataChanged.emit(index, index, [Qt.DisplayRole, Qt.EditRole, Qt.FontRole])
+        return True
+
+    def _loaded(self, row): # the person hash at a row, None (and a fetch of its page) when the page isn't here
+        page, offset = divmod(row, PAGE_SIZE)
+        records = self.pages.get(page)
+        if records is None:
+            if page not in self.pending and page not in self.failed:
+                self.pending.add(page)
+                self.request_page(page, self.generation)
+            return None
+        self.pages.move_to_end(page)
+        return records[offset] if offset < len(records) else None  # a page comes back short if people were deleted meanwhile
+
+    def set_page(self, page, generation, records): # stores a fetched page and repaints its rows
+        if generation != self.generation:
+            return
+        self.pending.discard(page)
+        if self.edits.people:
+            records = [self.edits.overlay(person_data) for person_data in records]
+        self.pages[page] = records
+        for old_page in list(self.pages):
+            if len(self.pages) <= MAX_PAGES:
+                break
+            if old_page != page:
+                del self.pages[old_page]
+        first = page * PAGE_SIZE
+        last = min(first + PAGE_SIZE, self.total) - 1
+        if last >= first:
+            self.dataChanged.emit(self.index(first, 0), self.index(last, len(COLUMNS) - 1), [Qt.DisplayRole, Qt.EditRole])
+
+    def page_failed(self, page, generation):
+        if generation == self.generation:
+            self.pending.discard(page)
+            self.failed.add(page)
+
+    def reset(self, total): # shows the first `total` rows of the order index, all pages unloaded
+        self.beginResetModel()
+        self.generation += 1
+        self.total = total
+        self.pages.clear()
+        self.pending.clear()
+        self.failed.clear()
+        self.endResetModel()
+
+    def clear(self):
+        self.reset(0)
+
+    def append_records(self, records): # new people sort last in the order index, so they are new rows at the end
+        if not records:
+            return
+        first = self.total
+        self.beginInsertRows(QModelIndex(), first, first + len(records) - 1)
+        for row, person_data in enumerate(records, first):
+            page, offset = divmod(row, PAGE_SIZE)
+            loaded = self.pages.get(page)
+            if loaded is not None and len(loaded) == offset:  # the page is here and ends just before the new row
+                loaded.append(dict(self.edits.overlay(person_data)))
+        self.total += len(records)
+        self.endInsertRows()
+
+    def apply_changes(self, records, deleted_ids): # patches the loaded rows of changed people in place, rows only move on the next reload
+        changed = {person_data["_id"]: person_data for person_data in records}
+        updated = 0
+        for page, loaded in self.pages.items():
+            for offset, person_data in enumerate(loaded):
+                if person_data.get("_id") in changed:
+                    loaded[offset] = dict(self.edits.overlay(changed[person_data["_id"]]))
+                    row = page * PAGE_SIZE + offset
+                    self.dataChanged.emit(self.index(row, 0), self.index(row, len(COLUMNS) - 1), [Qt.DisplayRole, Qt.EditRole, Qt.FontRole])
+                    updated += 1
+        return updated, 0, 0
+
+    def set_versions(self, versions):
+        for loaded in self.pages.values():
+            for person_data in loaded:
+                if person_data.get("_id") in versions:
+                    person_data[VERSION_FIELD] = versions[person_data["_id"]]
+
+    def remove_rows(self, rows): # removes the given rows, later pages shift so they are fetched again
+        ranges = _ranges(rows)
+        if not ranges:
+            return
+        self._drop_pages_from(ranges[0][0] // PAGE_SIZE)
+        for first, last in reversed(ranges):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            self.total -= last - first + 1
+            self.endRemoveRows()
+
+    def _drop_pages_from(self, first_page):
+        self.generation += 1  # fetches in flight may have read the old positions
+        self.pending.clear()
+        self.failed.clear()
+        for page in [page for page in self.pages if page >= first_page]:
+            del self.pages[page]
+
+    def record(self, row): # returns a row as a person hash, blank while its page is still loading
+        person_data = self._loaded(row)
+        return dict(person_data) if person_data is not None else dict.fromkeys(FIELDS, "")
+
+def _version(person_data): # a row's stored version, None (an edit saves unconditionally) while a row written from here isn't stored yet
+    version = person_data.get(VERSION_FIELD, "0")  # a person written before versioning has none stored
+    return sys.intern(version) if version is not None else None
+
+def _ranges(rows): # groups row numbers into sorted (first, last) contiguous ranges
+    ranges = []
+    for row in sorted(set(rows)):
+        if ranges and ranges[-1][1] == row - 1:
+            ranges[-1] = (ranges[-1][0], row)
+        else:
+            ranges.append((row, row))
+    return ranges
@@ -0,0 +1,1258 @@
+import asyncio
+import csv
+import math
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from string import Template
+import redis
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry
+from instrumentation import Metrics, InstrumentedConnection, InstrumentedRedis
+from async_engine import AsyncEngine
+
+COLUMNS = ['ID', 'First Name', 'Middle Name', 'Last Name', 'Age', 'Title', 'Join Date', 'Department', 'Address 1', 'Address 2', 'Country', 'Misc']
+FIELDS = ['_id'] + COLUMNS[1:]  # hash field stored in Redis for each column
+NGRAM_SIZE = 3  # length of the substrings indexed for name search, shorter search text falls back to a scan
+NAME_INDEXES = {"First Name": "idx:first", "Last Name": "idx:last"}  # hash field -> key prefix of its trigram sets
+RANGE_INDEXES = {"Age": "idx:age", "Join Date": "idx:joined"}  # hash field -> sorted set of ids scored by range_score
+FACET_INDEXES = {"Department": "idx:dept", "Country": "idx:country"}  # hash field -> prefix of one id set per value, the prefix key itself holds the values seen
+JOIN_DATE_FORMAT = "%m-%d-%Y"  # Join Date as the UI writes it, "MM-dd-yyyy"
+SEARCH_INDEX_READY = "idx:ready:4"  # set once the name, range, facet and order indexes cover every stored person, bumped whenever an index is added
+ORDER_INDEX = "person_order"  # sorted set of person ids scored by creation time in ms, the table pages through it
+RECORD_FORMATS = ["hash", "compact", "packed"]  # how a person hash is laid out on the server, see encode_person
+FIELD_CODES = {"First Name": "f", "Middle Name": "m", "Last Name": "l", "Age": "a", "Title": "t", "Join Date": "j",
+               "Department": "d", "Address 1": "a1", "Address 2": "a2", "Country": "c", "Misc": "x"}  # compact field names
+PACKED_FIELD = "p"  # the single field of a packed record
+PACKED_SEPARATOR = "\x1f"  # ASCII unit separator between the packed values
+VERSION_FIELD = "_v"  # bumped by every write of a person, in every record format; put_fields only writes over the version it was given
+STORED_FIELDS = FIELDS + list(FIELD_CODES.values()) + [PACKED_FIELD]  # every field name any record format writes
+INDEXED_FIELDS = list(NAME_INDEXES) + list(FACET_INDEXES)  # fields whose old value a write must read to update the set indexes
+STORED_INDEXED_FIELDS = INDEXED_FIELDS + [FIELD_CODES[field] for field in INDEXED_FIELDS] + [PACKED_FIELD]  # fields holding them in any record format
+CHANGE_STREAM = "person_changes"  # one entry per write batch: op "put" or "del" and the comma-joined ids, or op "reload" after a bulk import
+CHANGE_STREAM_MAX_AGE_MS = 10 * 60 * 1000  # entries kept (approximately, trimmed with MINID), a client further behind reloads instead
+WATCH_RETRIES = 5  # WATCH/MULTI/EXEC attempts before a write gives up on people other clients keep changing
+WATCH_BACKOFF = 0.01  # seconds before the second attempt, doubled before each later one
+CHANGE_READ_COUNT = 1000  # stream entries per XREAD round trip
+LIVE_BLOCK_MS = 1000  # how long a live XREAD waits for new entries, also how quickly following stops; below socket_timeout
+LIVE_DEBOUNCE_SECONDS = 0.25  # a burst of writes within this window is delivered as one batch
+LIVE_MAX_IDS = 5000  # people per live batch, a longer burst is split so each fetch stays bounded
+# Lua shared by the server-side scripts: reads the searchable fields of an HGETALL reply in any record format
+LUA_PERSON_HELPERS = Template(r"""
+local function trim(s) return (string.gsub(s, '^%s*(.-)%s*$$', '%1')) end
+local function contains(value, text) return text == '' or string.find(string.lower(value), text, 1, true) ~= nil end
+local function person_fields(flat)
+  local h = {}
+  for j = 1, #flat, 2 do h[flat[j]] = flat[j + 1] end
+  local values = nil
+  if h['$packed'] then
+    values = {}
+    for value in string.gmatch(h['$packed'] .. '\031', '(.-)\031') do values[#values + 1] = value end
+  end
+  local function get(name, code, position)
+    if values then return values[position] or '' end
+    if h['$first_code'] then return h[code] or '' end
+    return h[name] or ''
+  end
+  return get('First Name', '$first_code', $first_position), get('Last Name', '$last_code', $last_position),
+    trim(get('Department', '$department_code', $department_position)), trim(get('Country', '$country_code', $country_position))
+end
+""").substitute(
+    packed=PACKED_FIELD,
+    first_code=FIELD_CODES["First Name"], first_position=FIELDS.index("First Name"),  # FIELDS[0] is the id, so this is the 1-based packed position
+    last_code=FIELD_CODES["Last Name"], last_position=FIELDS.index("Last Name"),
+    department_code=FIELD_CODES["Department"], department_position=FIELDS.index("Department"),
+    country_code=FIELD_CODES["Country"], country_position=FIELDS.index("Country"),
+)
+
+# Deletes the people among ARGV[13..] who still match a search, checked and removed in one atomic step on the server.
+# ARGV: first, last (lowercased ASCII), then for Age and Join Date: "1" if ranged, low, high ("" leaves an end open),
+# then department, country ("" for any), oldest change log entry id kept, key prefix. KEYS: person_ids, order index, age index, join date index, change log.
+# Person hashes and facet sets are named from the key prefix instead of KEYS; a shard's hash tag keeps them in the slot of KEYS.
+# Returns id, first name, last name of each person deleted: name trigrams follow Python's Unicode lowercasing, so the caller drops those.
+DELETE_MATCHING_SCRIPT = LUA_PERSON_HELPERS + Template(r"""
+local function in_range(key, id, ranged, low, high)
+  if ranged ~= '1' then return true end
+  local score = redis.call('ZSCORE', key, id)
+  if not score then return false end
+  score = tonumber(score)
+  return (low == '' or score >= tonumber(low)) and (high == '' or score <= tonumber(high))
+end
+local deleted = {}
+local ids = {}
+for i = 13, #ARGV do
+  local id = ARGV[i]
+  local key = ARGV[12] .. 'person:' .. id
+  local flat = redis.call('HGETALL', key)
+  if #flat > 0 then
+    local first, last, department, country = person_fields(flat)
+    if contains(first, ARGV[1]) and contains(last, ARGV[2])
+        and in_range(KEYS[3], id, ARGV[3], ARGV[4], ARGV[5]) and in_range(KEYS[4], id, ARGV[6], ARGV[7], ARGV[8])
+        and (ARGV[9] == '' or department == ARGV[9]) and (ARGV[10] == '' or country == ARGV[10]) then
+      redis.call('UNLINK', key)
+      redis.call('SREM', KEYS[1], id)
+      redis.call('ZREM', KEYS[2], id)
+      redis.call('ZREM', KEYS[3], id)
+      redis.call('ZREM', KEYS[4], id)
+      if department ~= '' then redis.call('SREM', ARGV[12] .. '$department_prefix:' .. department, id) end
+      if country ~= '' then redis.call('SREM', ARGV[12] .. '$country_prefix:' .. country, id) end
+      ids[#ids + 1] = id
+      deleted[#deleted + 1] = id
+      deleted[#deleted + 1] = first
+      deleted[#deleted + 1] = last
+    end
+  end
+end
+if #ids > 0 then
+  redis.call('XADD', KEYS[5], 'MINID', '~', ARGV[11], '*', 'op', 'del', 'ids', table.concat(ids, ','))
+end
+return deleted
+""").substitute(department_prefix=FACET_INDEXES["Department"], country_prefix=FACET_INDEXES["Country"])
+
+# One SSCAN page of person_ids filtered on the server, so only likely hits cross the network.
+# ARGV: cursor, COUNT hint, first, last (lowercased ASCII), department, country ("" for any), key prefix. KEYS: person_ids.
+# Returns the next cursor, the number of ids scanned, then id and HGETALL reply of each person whose names and facets match.
+SEARCH_SCAN_SCRIPT = LUA_PERSON_HELPERS + r"""
+local scan = redis.call('SSCAN', KEYS[1], ARGV[1], 'COUNT', ARGV[2])
+local result = {scan[1], #scan[2]}
+for _, id in ipairs(scan[2]) do
+  local flat = redis.call('HGETALL', ARGV[7] .. 'person:' .. id)
+  if #flat > 0 then
+    local first, last, department, country = person_fields(flat)
+    if contains(first, ARGV[3]) and contains(last, ARGV[4]) and (ARGV[5] == '' or department == ARGV[5]) and (ARGV[6] == '' or country == ARGV[6]) then
+      result[#result + 1] = id
+      result[#result + 1] = flat
+    end
+  end
+end
+return result
+"""
+# Drops values whose id set has emptied from a facet's value list, checked and removed in one step so a concurrent SADD is never lost.
+# KEYS: the value list, which is also the prefix of the per-value id sets. ARGV: the values seen empty. Returns the number removed.
+PRUNE_FACET_VALUES_SCRIPT = r"""
+local removed = 0
+for _, value in ipairs(ARGV) do
+  if redis.call('SCARD', KEYS[1] .. ':' .. value) == 0 then
+    removed = removed + redis.call('SREM', KEYS[1], value)
+  end
+end
+return removed
+"""
+RECORD_BYTES_SAMPLE = 200  # records measured when reporting memory per record
+
+def read_people_csv(file): # yields a person hash for every row of an exported CSV file
+    reader = csv.DictReader(file)
+    check_csv_headers(reader.fieldnames)
+    for row in reader:
+        yield person_from_row(row)
+
+def check_csv_headers(fieldnames): # raises CsvFormatError unless every column of an exported CSV file is there
+    expected_headers = {'ID', 'First Name', 'Middle Name', 'Last Name', 'Age', 'Title', 'Join Date', 'Department', 'Address 1', 'Address 2', 'Country', 'Misc'}
+    if not fieldnames or not all(header in fieldnames for header in expected_headers):
+        raise CsvFormatError("CSV file must contain all required headers:"
+                             "ID, First Name, Middle Name, Last Name, Age, Title, Join Date, Department, Address 1, Address 2, Country, Misc")
+
+def person_from_row(row): # person hash for a CSV row keyed by column name
+    id = row['ID'] if row['ID'] else str(uuid.uuid4())  # Generate a new ID if not provided
+    
+    return {
+        "_id": id,
+        "First Name": row['First Name'] or "",
+        "Middle Name": row['Middle Name'] or "",
+        "Last Name": row['Last Name'] or "",
+        "Age": row['Age'] or "",
+        "Title": row['Title'] or "",
+        "Join Date": row['Join Date'] or "",
+        "Department": row['Department'] or "",
+        "Address 1": row['Address 1'] or "",
+        "Address 2": row['Address 2'] or "",
+        "Country": row['Country'] or "",
+        "Misc": row['Misc'] or ""
+    }
+
+def write_people_csv(file, pages): # writes the header and every page of person hashes to an open CSV file, yielding the running row count
+    writer = csv.writer(file)
+    writer.writerow(COLUMNS)
+    rows = 0
+    for records in pages:
+        writer.writerows([person_data.get(field, "") for field in FIELDS] for person_data in records)
+        rows += len(records)
+        yield rows
+
+def name_matches(person_data, firstname, lastname): # case-insensitive substring match on the name fields, empty search text matches everything
+    firstname_match = not firstname or re.search(re.escape(firstname), person_data.get("First Name", ""), re.IGNORECASE)
+    lastname_match = not lastname or re.search(re.escape(lastname), person_data.get("Last Name", ""), re.IGNORECASE)
+    return bool(firstname_match and lastname_match)
+
+def range_score(field, value): # sorted-set score of an Age (years) or Join Date (days since 1970-01-01), None when it doesn't parse
+    value = (value or "").strip()
+    try:
+        if field == "Join Date":
+            return (datetime.strptime(value, JOIN_DATE_FORMAT).date() - date(1970, 1, 1)).days
+        score = float(value)
+    except ValueError:
+        return None
+    return score if math.isfinite(score) else None
+
+def join_date_bound(text, upper=False): # range bound for a "yyyy" or "MM-dd-yyyy" join date, a year covers all of it; raises ValueError
+    text = text.strip()
+    if re.fullmatch(r"\d{4}", text):
+        text = f"12-31-{text}" if upper else f"01-01-{text}"
+    score = range_score("Join Date", text)
+    if score is None:
+        raise ValueError(f"Join dates look like yyyy or MM-dd-yyyy, not {text!r}")
+    return score
+
+def in_ranges(person_data, ranges): # whether a person falls inside every (low, high) range, None leaves that end open
+    for field, (low, high) in ranges.items():
+        score = range_score(field, person_data.get(field))
+        if score is None or (low is not None and score < low) or (high is not None and score > high):
+            return False
+    return True
+
+def facet_matches(person_data, facets): # whether a person has every {field: value} facet
+    return all((person_data.get(field) or "").strip() == value for field, value in facets.items())
+
+def search_matches(person_data, firstname, lastname, ranges=None, facets=None): # whether a person is a hit for PersonRepository.search
+    return name_matches(person_data, firstname, lastname) and in_ranges(person_data, ranges or {}) and facet_matches(person_data, facets or {})
+
+def change_min_id(): # the oldest change log entry id a write keeps, older ones are trimmed
+    return int(time.time() * 1000) - CHANGE_STREAM_MAX_AGE_MS
+
+def _raise_contended(replies, person_ids): # a whole-record write can't be reported back as a conflict, so losing every WATCH attempt is an error
+    if replies is None:
+        raise redis.WatchError(f"{len(person_ids)} people kept changing under other clients' writes, none of them were written")
+
+def stream_id(entry_id): # a stream entry id as a comparable (ms, seq) tuple
+    ms, seq = entry_id.split("-")
+    return int(ms), int(seq)
+
+def encode_person(person_data, record_format): # the stored hash for a person, the id lives in the key for compact and packed
+    if record_format == "packed":
+        values = [person_data.get(field) or "" for field in FIELDS[1:]]
+        if not any(PACKED_SEPARATOR in value for value in values):
+            return {PACKED_FIELD: PACKED_SEPARATOR.join(values)}
+        record_format = "compact"  # a value that contains the separator can't be packed
+    if record_format == "compact":
+        # Empty fields are left out, the first name is always kept so the hash is never empty
+        return {code: person_data.get(field) or "" for field, code in FIELD_CODES.items() if person_data.get(field) or code == "f"}
+    if VERSION_FIELD in person_data:
+        return {field: value for field, value in person_data.items() if field != VERSION_FIELD}  # the version is only ever incremented
+    return person_data
+
+def decode_person(person_id, stored): # turns a stored hash in any record format back into a person hash
+    if PACKED_FIELD in stored:
+        person_data = dict(zip(FIELDS[1:], stored[PACKED_FIELD].split(PACKED_SEPARATOR)))
+    elif FIELD_CODES["First Name"] in stored:
+        person_data = {field: stored.get(code, "") for field, code in FIELD_CODES.items()}
+    else:
+        person_data = stored
+    if VERSION_FIELD in stored:
+        person_data[VERSION_FIELD] = stored[VERSION_FIELD]
+    person_data["_id"] = person_data.get("_id") or person_id
+    return person_data
+
+def stored_format(stored): # the record format a stored hash was written in
+    if PACKED_FIELD in stored:
+        return "packed"
+    return "compact" if FIELD_CODES["First Name"] in stored else "hash"
+
+def chunked(items, size): # yields lists of up to size items from any iterable
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def stamp_versions(records, versions): # sets each written person hash's version to the one its write left stored, so an edit of it isn't a conflict
+    for person_data in records:
+        person_data[VERSION_FIELD] = versions[person_data["_id"]]
+    return records
+
+def name_grams(name): # every NGRAM_SIZE-character substring of a lowercased name
+    name = name.lower()
+    return {name[i:i + NGRAM_SIZE] for i in range(len(name) - NGRAM_SIZE + 1)}
+
+class RecordCache: # LRU cache of person hashes, kept coherent by PersonRepository's invalidation listener
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.records = OrderedDict()
+        self.lock = threading.Lock()  # used from worker threads and the invalidation thread
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0  # bumped on every invalidation so fetches that raced one are not cached
+
+    def get_many(self, person_ids): # returns {id: copy of the record} for cached ids and counts hits/misses
+        found = {}
+        with self.lock:
+            for person_id in person_ids:
+                person_data = self.records.get(person_id)
+                if person_data is not None:
+                    self.records.move_to_end(person_id)
+                    found[person_id] = dict(person_data)  # callers edit what they get, the cache must keep the stored values
+            self.hits += len(found)
+            self.misses += len(person_ids) - len(found)
+        return found
+
+    def put_many(self, records, since): # caches fetched records unless an invalidation arrived after `since`
+        with self.lock:
+            if self.invalidations != since:
+                return
+            for person_data in records:
+                self.records[person_data["_id"]] = dict(person_data)
+                self.records.move_to_end(person_data["_id"])
+            while len(self.records) > self.max_size:
+                self.records.popitem(last=False)
+
+    def invalidate(self, person_ids=None): # drops the given ids, or everything when person_ids is None
+        with self.lock:
+            self.invalidations += 1
+            if person_ids is None:
+                self.records.clear()
+            else:
+                for person_id in person_ids:
+                    self.records.pop(person_id, None)
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self.records), "max_size": self.max_size}
+
+class CsvFormatError(Exception): # raised when an imported CSV file is missing required headers
+    pass
+
+class PersonRepository: # Redis-backed store of person hashes with batched reads and writes, free of any GUI code
+    DEFAULT_BATCH_SIZE = 500
+    DEFAULT_CACHE_SIZE = 0  # record cache is off unless configured
+    DEFAULT_RECORD_FORMAT = "hash"  # field names spelled out, readable in any Redis browser
+    INVALIDATION_PROBE_TIMEOUT = 1.0  # seconds to wait for the keyspace notification probe
+    DEFAULT_CONNECTION_OPTIONS = {
+        "db": 0,
+        "max_connections": 16,  # callers wait for a free connection instead of opening more
+        "pool_timeout": 20.0,  # seconds to wait for a free connection
+        "socket_timeout": 10.0,
+        "socket_connect_timeout": 5.0,
+        "health_check_interval": 30,  # idle connections are PINGed before reuse, busy ones never are
+        "retries": 5,  # attempts after a connection error or timeout before giving up
+        "backoff_base": 0.1,  # seconds, doubled on every retry
+        "backoff_cap": 5.0,  # longest wait between retries in seconds
+        "async_concurrency": 4,  # batches fetched or written at once by the async engine
+        "cluster_shards": 16,  # hash-tagged shards ClusterPersonRepository spreads people over when it first meets an empty cluster
+    }
+
+    def __init__(self, redis_url, redis_port, redis_user, redis_password, batch_size=DEFAULT_BATCH_SIZE, cache_size=DEFAULT_CACHE_SIZE, connection_options=None, metrics=None, async_engine=False, record_format=DEFAULT_RECORD_FORMAT,
+                 client=None, key_prefix=""):
+        self.batch_size = batch_size
+        self.record_format = record_format  # format new writes use, reads accept every format
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.engine = None  # AsyncEngine while the async engine is on
+        self.sintercard = True  # cleared when the server predates SINTERCARD
+        self.scan_filter = True  # unindexed searches filter names and facets in Lua on the server, cleared when the server refuses scripts
+        self.cache = None
+        self.cache_mode = None  # "tracking" or "keyspace" while the cache is active
+        self._cache_connections = []
+        self._cache_stop = threading.Event()
+        # Every key starts with key_prefix; ClusterPersonRepository gives each shard a hash tag so its keys share one cluster slot
+        self.key_prefix = key_prefix
+        self.ids_key = f"{key_prefix}person_ids"
+        self.order_key = f"{key_prefix}{ORDER_INDEX}"
+        self.change_key = f"{key_prefix}{CHANGE_STREAM}"
+        self.ready_key = f"{key_prefix}{SEARCH_INDEX_READY}"
+        self.name_indexes = {field: f"{key_prefix}{prefix}" for field, prefix in NAME_INDEXES.items()}
+        self.range_indexes = {field: f"{key_prefix}{key}" for field, key in RANGE_INDEXES.items()}
+        self.facet_indexes = {field: f"{key_prefix}{prefix}" for field, prefix in FACET_INDEXES.items()}
+        options = dict(self.DEFAULT_CONNECTION_OPTIONS, **(connection_options or {}))
+        self._server = (redis_url, redis_port, redis_user or None, redis_password or None)
+        self._options = options
+        if client is not None:
+            # A shard of ClusterPersonRepository: the cluster client is shared and owned by it, the cache and async engine stay off
+            self.pool = None
+            self.client = client
+            self.connected = True
+            return
+        try:
+            self.pool = redis.BlockingConnectionPool(
+                host=redis_url,
+                port=int(redis_port),  # Convert port to integer
+                username=redis_user or None,  # a local server may run without ACLs
+                password=redis_password or None,
+                db=options["db"],
+                decode_responses=True,
+                max_connections=options["max_connections"],
+                timeout=options["pool_timeout"],
+                socket_timeout=options["socket_timeout"],
+                socket_connect_timeout=options["socket_connect_timeout"],
+                socket_keepalive=True,
+                health_check_interval=options["health_check_interval"],
+                retry=Retry(ExponentialBackoff(cap=options["backoff_cap"], base=options["backoff_base"]), options["retries"]),
+                retry_on_error=[redis.ConnectionError, redis.TimeoutError],
+                connection_class=InstrumentedConnection,
+                metrics=self.metrics
+            )
+            self.client = InstrumentedRedis(self.metrics, connection_pool=self.pool)
+            # Test the connection immediately
+            self.client.ping()
+            self.connected = True
+        except (redis.ConnectionError, redis.TimeoutError, ValueError) as e:
+            self.connected = False
+            raise redis.ConnectionError(f"Connection failed: {str(e)}")
+
+        self.configure_cache(cache_size)
+        self.configure_async(async_engine)
+
+    def configure_async(self, enabled): # starts or stops the async engine that overlaps batch round trips
+        if enabled and self.engine is None:
+            host, port, username, password = self._server
+            self.engine = AsyncEngine(host, int(port), username, password, self._options, self.metrics)
+        elif not enabled and self.engine is not None:
+            engine, self.engine = self.engine, None
+            engine.close()
+
+    def configure_cache(self, cache_size): # enables, resizes or (with 0) disables the client-side record cache
+        if cache_size <= 0:
+            self._stop_cache()
+        elif self.cache is not None:
+            self.cache.max_size = cache_size
+            self.cache.put_many([], self.cache.invalidations)  # trims to the new size
+        else:
+            self._start_cache(cache_size)
+
+    def cache_stats(self): # hit/miss counters of the record cache, None when it is off
+        if self.cache is None:
+            return None
+        return dict(self.cache.stats(), mode=self.cache_mode)
+
+    def close(self): # stops the invalidation listener and the async engine and releases the connections
+        self._stop_cache()
+        self.configure_async(False)
+        if self.pool is not None:
+            self.pool.disconnect()
+
+    def _start_cache(self, cache_size): # the cache is only used when the server can tell us about changes
+        listener = self.client.connection_pool.make_connection()
+        listener.connect()
+        try:
+            self.cache_mode = self._subscribe_tracking(listener) or self._subscribe_keyspace(listener)
+        except redis.RedisError:
+            self.cache_mode = None
+        if self.cache_mode is None:
+            listener.disconnect()
+            return
+
+        self._cache_connections.append(listener)
+        self._cache_stop.clear()
+        self.cache = RecordCache(cache_size)
+        threading.Thread(target=self._listen_for_invalidations, args=(listener, self.cache), daemon=True).start()
+
+    def _subscribe_tracking(self, listener): # RESP2 CLIENT TRACKING in broadcast mode, redirected to the listener connection
+        listener.send_command("CLIENT", "ID")
+        client_id = listener.read_response()
+        tracker = self.client.connection_pool.make_connection()  # keeps tracking enabled for as long as it stays open
+        try:
+            tracker.send_command("CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST", "PREFIX", "person:")
+            tracker.read_response()
+        except redis.ResponseError:
+            tracker.disconnect()
+            return None  # server older than Redis 6 or command not allowed
+        self._cache_connections.append(tracker)
+
+        listener.send_command("SUBSCRIBE", "__redis__:invalidate")
+        listener.read_response()
+        return "tracking"
+
+    def _subscribe_keyspace(self, listener): # keyspace notifications, only if the server already has them enabled
+        db = self.client.connection_pool.connection_kwargs.get("db", 0)
+        probe = f"cache_probe:{uuid.uuid4()}"
+        listener.send_command("PSUBSCRIBE", f"__keyspace@{db}__:person:*", f"__keyspace@{db}__:{probe}")
+        listener.read_response()
+        listener.read_response()
+
+        # Hash and generic events are needed to see updates and deletes, probe for both
+        self.client.hset(probe, "probe", 1)
+        self.client.delete(probe)
+        events = set()
+        while events != {"hset", "del"} and listener.can_read(timeout=self.INVALIDATION_PROBE_TIMEOUT):
+            events.add(listener.read_response()[3])
+        if events != {"hset", "del"}:
+            return None
+
+        listener.send_command("PUNSUBSCRIBE", f"__keyspace@{db}__:{probe}")
+        return "keyspace"
+
+    def _listen_for_invalidations(self, listener, cache): # runs on a daemon thread until the cache is stopped
+        try:
+            while not self._cache_stop.is_set():
+                if not listener.can_read(timeout=1.0):
+                    continue
+                message = listener.read_response()
+                if message[0] == "message":  # ['message', '__redis__:invalidate', keys or None on FLUSHALL]
+                    keys = message[2]
+                    cache.invalidate(None if keys is None else [key.split(":", 1)[1] for key in keys])
+                elif message[0] == "pmessage":  # ['pmessage', pattern, '__keyspace@0__:person:<id>', event]
+                    cache.invalidate([message[2].split(":", 2)[2]])
+        except (redis.RedisError, OSError):
+            pass
+        # Without the listener the cache can no longer be trusted
+        if self.cache is cache:
+            self._stop_cache()
+
+    def _stop_cache(self):
+        self._cache_stop.set()
+        for connection in self._cache_connections:
+            connection.disconnect()
+        self._cache_connections = []
+        self.cache = None
+        self.cache_mode = None
+
+    def get_client(self):
+        return self.client
+
+    def person_key(self, person_id): # the hash holding a person
+        return f"{self.key_prefix}person:{person_id}"
+
+    def server_command_stats(self): # INFO commandstats (calls, usec_per_call, ...), empty when the server won't report it
+        try:
+            return self.client.info("commandstats")
+        except redis.RedisError:
+            return {}
+    
+    def check_connection(self):
+        try:
+            self.client.ping()
+            self.connected = True
+            return True
+        except redis.ConnectionError:
+            self.connected = False
+            return False
+
+    def query_people(self): # returns every person record plus round trip and timing stats
+        start = time.perf_counter()
+        person_ids = self.client.smembers(self.ids_key)
+        records, stats = self.get_many(person_ids)
+        stats["round_trips"] += 1  # SMEMBERS
+        stats["seconds"] = time.perf_counter() - start
+        return records, stats
+
+    def get_many(self, person_ids, batch_size=None): # pipelines HGETALL in chunks so a fetch costs one round trip per batch
+        batch_size = batch_size or self.batch_size
+        records = []
+        round_trips = 0
+        start = time.perf_counter()
+
+        for chunk_records, chunk_round_trips in self._fetch_chunks(chunked(person_ids, batch_size)):
+            records.extend(chunk_records)
+            round_trips += chunk_round_trips
+
+        return records, {"records": len(records), "round_trips": round_trips, "seconds": time.perf_counter() - start}
+
+    def _fetch_chunks(self, chunks): # yields (records, round trips) per chunk of ids in order, several chunks in flight with the async engine
+        engine = self.engine
+        if engine is not None:
+            return engine.map_ordered(self._fetch_chunk_async, chunks)
+        return (self._fetch_chunk(chunk) for chunk in chunks)
+
+    def _fetch_chunk(self, chunk): # cached records plus one pipelined HGETALL for the rest
+        cache, cached, missing, since = self._lookup_cached(chunk)
+        if not missing:
+            return [cached[person_id] for person_id in chunk], 0
+        pipe = self.client.pipeline(transaction=False)
+        for person_id in missing:
+            pipe.hgetall(self.person_key(person_id))
+        fetched = self._store_fetched(cache, missing, pipe.execute(), since)
+        return [cached.get(person_id) or fetched[person_id] for person_id in chunk], 1
+
+    async def _fetch_chunk_async(self, chunk): # _fetch_chunk on the async engine's loop
+        cache, cached, missing, since = self._lookup_cached(chunk)
+        if not missing:
+            return [cached[person_id] for person_id in chunk], 0
+        pipe = self.engine.client.pipeline(transaction=False)
+        for person_id in missing:
+            pipe.hgetall(self.person_key(person_id))
+        fetched = self._store_fetched(cache, missing, await self.engine.execute(pipe, "PIPELINE"), since)
+        return [cached.get(person_id) or fetched[person_id] for person_id in chunk], 1
+
+    def _lookup_cached(self, chunk): # splits a chunk of ids into cached records and ids to fetch
+        cache = self.cache
+        cached = cache.get_many(chunk) if cache is not None else {}
+        missing = [person_id for person_id in chunk if person_id not in cached]
+        since = cache.invalidations if cache is not None else None
+        return cache, cached, missing, since
+
+    def _store_fetched(self, cache, person_ids, results, since): # maps fetched hashes to their ids and caches the ones that exist
+        fetched = {}
+        for person_id, stored in zip(person_ids, results):
+            fetched[person_id] = decode_person(person_id, stored) if stored else {"_id": person_id}
+        if cache is not None:
+            cache.put_many([person_data for person_data in fetched.values() if len(person_data) > 1], since)
+        return fetched
+
+    def count(self): # number of stored people
+        return self.client.scard(self.ids_key)
+
+    def put_many(self, records, new=False, transaction=False, logged=True): # writes person hashes and keeps person_ids and the name index in step, returns {id: stored version}
+        records = list({data["_id"]: data for data in records}.values())  # last write wins, the index diff needs one entry per id
+        person_ids = [data["_id"] for data in records]
+        self._invalidate_cached(person_ids)
+        if new:
+            pipe = self.client.pipeline(transaction=transaction)
+            written = self._queue_put(pipe, records, [{}] * len(records), new, logged)
+            replies = pipe.execute()
+        else:  # the index diff reads the values being replaced under WATCH, so two writers of one person can't both remove the same old entries
+            written, replies = self._write_watched([self.person_key(person_id) for person_id in person_ids], lambda read: self._queue_read_names(read, person_ids),
+                                                   lambda pipe, stored: self._queue_put(pipe, records, self._names(stored), new, logged))
+            _raise_contended(replies, person_ids)
+        return {person_id: str(replies[index]) for person_id, index in written.items()}
+
+    async def _put_many_async(self, records, new=False, transaction=False, logged=True): # put_many on the async engine's loop
+        records = list({data["_id"]: data for data in records}.values())
+        person_ids = [data["_id"] for data in records]
+        self._invalidate_cached(person_ids)
+        if new:
+            pipe = self.engine.client.pipeline(transaction=transaction)
+            written = self._queue_put(pipe, records, [{}] * len(records), new, logged)
+            replies = await self.engine.execute(pipe, "MULTI" if transaction else "PIPELINE")
+        else:
+            written, replies = await self._write_watched_async([self.person_key(person_id) for person_id in person_ids], lambda read: self._queue_read_names(read, person_ids),
+                                                               lambda pipe, stored: self._queue_put(pipe, records, self._names(stored), new, logged))
+            _raise_contended(replies, person_ids)
+        return {person_id: str(replies[index]) for person_id, index in written.items()}
+
+    def _queue_put(self, pipe, records, old_names, new, logged=True): # returns {id: position of its HINCRBY reply}
+        now = int(time.time() * 1000)
+        written = {}
+        for data, old in zip(records, old_names):
+            self._queue_store(pipe, data["_id"], encode_person(data, self.record_format), new)
+            written[data["_id"]] = len(pipe)
+            pipe.hincrby(self.person_key(data["_id"]), VERSION_FIELD, 1)
+            pipe.sadd(self.ids_key, data["_id"])
+            pipe.zadd(self.order_key, {data["_id"]: now}, nx=True)
+            self._update_name_index(pipe, data["_id"], old, data)
+            self._update_range_index(pipe, data["_id"], data)
+            self._update_facet_index(pipe, data["_id"], old, data)
+        if logged:
+            self._queue_change(pipe, "put", [data["_id"] for data in records])  # last, so a follower never fetches a person before the write lands
+        return written
+
+    def _queue_store(self, pipe, person_id, stored, new): # HSET, plus HDEL of fields left over from another format or now empty
+        stale = [] if new else [field for field in STORED_FIELDS if field not in stored]
+        if stale:
+            pipe.hdel(self.person_key(person_id), *stale)
+        pipe.hset(self.person_key(person_id), mapping=stored)
+
+    def put_stream(self, records, batch_size=None, writers=1): # writes an iterable of person hashes with one MULTI/EXEC per chunk, yielding each chunk once written with its stored versions stamped in
+        # The chunks log no ids, one "reload" entry at the end tells followers to reload instead
+        written = False
+        try:
+            for chunk in self._put_chunks(records, batch_size, writers):
+                written = True
+                yield chunk
+        finally:
+            if written:
+                self.log_reload()
+
+    def _put_chunks(self, records, batch_size, writers):
+        chunks = chunked(records, batch_size or self.batch_size)
+        if self.engine is not None:
+            engine = self.engine
+            yield from self._put_chunks_concurrently(chunks, lambda chunk: engine.submit(self._put_many_async(chunk, transaction=True, logged=False)), engine.concurrency)
+            return
+        writers = min(writers, self._options["max_connections"] // 2)  # a watched write holds its WATCH connection while it borrows one for the read
+        if writers > 1:
+            with ThreadPoolExecutor(writers) as executor:  # one pool connection per writer thread
+                yield from self._put_chunks_concurrently(chunks, lambda chunk: executor.submit(self.put_many, chunk, transaction=True, logged=False), writers)
+            return
+        for chunk in chunks:
+            yield stamp_versions(chunk, self.put_many(chunk, transaction=True, logged=False))
+
+    def _put_chunks_concurrently(self, chunks, submit, concurrency): # keeps several chunks in flight, waiting first for any earlier chunk that writes the same ids
+        pending = deque()  # (future, ids, chunk) in submission order
+        try:
+            for chunk in chunks:
+                person_ids = {data["_id"] for data in chunk}
+                # Overlapping chunks would read each other's stale names and leave orphaned index entries
+                while pending and (len(pending) >= concurrency or any(person_ids & ids for future, ids, done in pending)):
+                    future, ids, done = pending.popleft()
+                    yield stamp_versions(done, future.result())
+                pending.append((submit(chunk), person_ids, chunk))
+            while pending:
+                future, ids, done = pending.popleft()
+                yield stamp_versions(done, future.result())
+        finally:
+            for future, ids, done in pending:
+                future.cancel()
+
+    def put_fields(self, changes, versions=None): # writes only the changed fields of {id: {field: value}}, each person only if it is still at versions[id]
+        # Returns {"versions": {id: new version}, "conflicts": [current person hashes], "missing": [ids]} after one WATCH, read and MULTI/EXEC
+        versions = versions or {}
+        person_ids = list(changes)
+        keys = [self.person_key(person_id) for person_id in person_ids]
+
+        def queue_writes(pipe, stored):
+            result = self._queue_put_fields(pipe, changes, versions, stored)
+            self._invalidate_cached(list(result["written"]))
+            return result, stored
+        (result, stored), replies = self._write_watched(keys, lambda read: [read.hgetall(key) for key in keys], queue_writes)
+        written = result.pop("written")
+        if replies is None:  # other clients kept writing some of them, hand the batch back as conflicts instead of retrying forever
+            stored = dict(zip(person_ids, stored))
+            result["conflicts"].extend(decode_person(person_id, stored[person_id]) for person_id in written)
+            result["versions"] = {}
+        else:
+            result["versions"] = {person_id: str(replies[index]) for person_id, index in written.items()}
+        return result
+
+    def _queue_put_fields(self, pipe, changes, versions, stored): # queues the field writes of the people whose version matches, returns who was written where
+        written = {}  # id -> position of its HINCRBY reply
+        conflicts = []
+        missing = []
+        for person_id, old_stored in zip(changes, stored):
+            if not old_stored:
+                missing.append(person_id)  # deleted meanwhile, writing the fields would bring back a partial record
+                continue
+            expected = versions.get(person_id)
+            if expected is not None and old_stored.get(VERSION_FIELD, "0") != expected:
+                conflicts.append(decode_person(person_id, old_stored))
+                continue
+            key = self.person_key(person_id)
+            fields = changes[person_id]
+            record_format = stored_format(old_stored)  # a record keeps its format, migrate_records converts it
+            old = decode_person(person_id, old_stored)
+            new = dict(old, **fields)
+            if record_format == "packed":
+                self._queue_store(pipe, person_id, encode_person(new, "packed"), False)  # every value shares one field
+            elif record_format == "compact":
+                codes = {FIELD_CODES[field]: value for field, value in fields.items()}
+                emptied = [code for code, value in codes.items() if not value and code != FIELD_CODES["First Name"]]
+                if emptied:
+                    pipe.hdel(key, *emptied)
+                if len(emptied) < len(codes):
+                    pipe.hset(key, mapping={code: value for code, value in codes.items() if code not in emptied})
+            else:
+                pipe.hset(key, mapping=fields)
+            written[person_id] = len(pipe)  # commands queued so far, in a cluster pipeline too
+            pipe.hincrby(key, VERSION_FIELD, 1)
+            self._update_name_index(pipe, person_id, old, new)
+            self._update_range_index(pipe, person_id, new, fields)
+            self._update_facet_index(pipe, person_id, old, new)
+        self._queue_change(pipe, "put", list(written))
+        return {"written": written, "conflicts": conflicts, "missing": missing}
+
+    def delete_many(self, person_ids, batch_size=None): # deletes person hashes along with their person_ids and index entries, two round trips per batch
+        for chunk in chunked(person_ids, batch_size or self.batch_size):
+            old_names = self._read_names(chunk)
+            self._invalidate_cached(chunk)
+            pipe = self.client.pipeline(transaction=False)
+            self._queue_change(pipe, "del", chunk)
+            pipe.execute_command("UNLINK", *[self.person_key(person_id) for person_id in chunk])  # freed off the main thread; unlink() refuses several keys in a cluster pipeline
+            pipe.srem(self.ids_key, *chunk)
+            pipe.zrem(self.order_key, *chunk)
+            for key in self.range_indexes.values():
+                pipe.zrem(key, *chunk)
+            self._queue_unindex(pipe, chunk, old_names, self.facet_indexes)
+            pipe.execute()
+
+    def _queue_unindex(self, pipe, person_ids, old_names, facet_indexes): # one SREM per trigram or facet set any of the deleted people were in
+        members = defaultdict(list)
+        for person_id, old in zip(person_ids, old_names):
+            for field, prefix in self.name_indexes.items():
+                for gram in name_grams(old.get(field) or ""):
+                    members[f"{prefix}:{gram}"].append(person_id)
+            for field, prefix in facet_indexes.items():
+                value = (old.get(field) or "").strip()
+                if value:
+                    members[f"{prefix}:{value}"].append(person_id)
+        for key, person_ids in members.items():
+            pipe.srem(key, *person_ids)
+
+    def delete_matching(self, firstname, lastname, ranges=None, facets=None, batch_size=None): # deletes everyone search() would return without fetching them, yielding (deleted, checked, candidates)
+        batch_size = batch_size or self.batch_size
+        ranges = ranges or {}
+        facets = facets or {}
+        person_ids = self.search_ids(firstname, lastname, ranges, facets)
+        if not (firstname + lastname).isascii() or (ranges and person_ids is None):
+            # Lua lowercases ASCII only, and the range check reads the range indexes: match on this side instead
+            deleted = 0
+            for records, stats in self.search(firstname, lastname, batch_size, ranges, facets):
+                self.delete_many([person_data["_id"] for person_data in records], batch_size)
+                deleted += len(records)
+                yield deleted, stats["scanned"], stats["total"]
+            return
+
+        args = [firstname.lower(), lastname.lower()]
+        for field in self.range_indexes:
+            low, high = ranges.get(field, (None, None))
+            args += ["1" if field in ranges else "0", "" if low is None else repr(low), "" if high is None else repr(high)]
+        args += [facets.get("Department", ""), facets.get("Country", ""), change_min_id(), self.key_prefix]
+        keys = [self.ids_key, self.order_key, self.range_indexes["Age"], self.range_indexes["Join Date"], self.change_key]
+        script = self.client.register_script(DELETE_MATCHING_SCRIPT)
+        # Candidates come from the indexes when they can answer, otherwise from SSCAN; the script checks each one again
+        if person_ids is not None:
+            chunks, total = chunked(person_ids, batch_size), len(person_ids)
+        else:
+            chunks, total = self._scan_chunks(batch_size, True, {"round_trips": 0}), self.count()
+        deleted = 0
+        checked = 0
+        for chunk in chunks:
+            reply = script(keys=keys, args=args + chunk)
+            removed = reply[0::3]
+            self._invalidate_cached(removed)
+            if removed:
+                pipe = self.client.pipeline(transaction=False)
+                self._queue_unindex(pipe, removed, [{"First Name": first, "Last Name": last} for first, last in zip(reply[1::3], reply[2::3])], {})
+                pipe.execute()
+            deleted += len(removed)
+            checked += len(chunk)
+            yield deleted, checked, total
+
+    def _queue_change(self, pipe, op, person_ids): # appends one change log entry for a write batch
+        if person_ids:
+            pipe.xadd(self.change_key, {"op": op, "ids": ",".join(person_ids)}, minid=change_min_id(), approximate=True)
+
+    def log_reload(self): # appends a change log entry that sends every follower back to a full reload, after a bulk write too big to list
+        self.client.xadd(self.change_key, {"op": "reload"}, minid=change_min_id(), approximate=True)
+
+    def change_cursor(self): # (last entry id, entries added so far) of the change log, taken before a load so later changes can be replayed
+        info = self._change_stream_info()
+        if info is None:
+            return ("0-0", 0)
+        return (info["last-generated-id"], info.get("entries-added"))  # entries-added needs Redis 7
+
+    def _change_stream_info(self):
+        try:
+            return self.client.xinfo_stream(self.change_key)
+        except redis.ResponseError:  # no such key yet
+            return None
+
+    def changes_since(self, cursor): # people written and ids deleted after a change_cursor, in one XREAD per CHANGE_READ_COUNT entries plus a fetch of the written ones
+        last_id, added = cursor
+        info = self._change_stream_info()
+        if info is None:
+            truncated = last_id != "0-0"  # the stream was flushed away
+        elif added is not None and info.get("entries-added") is not None:
+            truncated = info["entries-added"] - info["length"] > added  # entries after the cursor were trimmed
+        else:
+            oldest = stream_id(info["first-entry"][0])
+            truncated = oldest[0] <= change_min_id() and oldest > stream_id(last_id)  # a guess before Redis 7: the log is being trimmed and has moved past the cursor
+        if truncated:
+            return {"cursor": self.change_cursor(), "truncated": True, "records": [], "deleted": [], "entries": 0}
+
+        ops = {}  # id -> last op
+        entries = 0
+        while info is not None:
+            result = self.client.xread({self.change_key: last_id}, count=CHANGE_READ_COUNT)
+            if not result:
+                break
+            page = result[0][1]
+            last_id = self._collect_changes(page, ops)
+            entries += len(page)
+            if len(page) < CHANGE_READ_COUNT:
+                break
+        return self._resolve_changes(ops, (last_id, added + entries if added is not None else None), entries)
+
+    def follow_changes(self, cursor, stopped): # yields changes_since results as writes arrive until stopped() returns True, a burst coalesced into one
+        changes = self.changes_since(cursor)  # catches up first, and reports a cursor that was trimmed away
+        yield changes
+        if changes["truncated"]:
+            return
+        last_id, added = changes["cursor"]
+        while not stopped():
+            result = self.client.xread({self.change_key: last_id}, count=CHANGE_READ_COUNT, block=LIVE_BLOCK_MS)
+            ops = {}
+            entries = 0
+            deadline = time.monotonic() + LIVE_DEBOUNCE_SECONDS
+            while result:
+                page = result[0][1]
+                last_id = self._collect_changes(page, ops)
+                entries += len(page)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or len(ops) >= LIVE_MAX_IDS or stopped():
+                    break
+                result = self.client.xread({self.change_key: last_id}, count=CHANGE_READ_COUNT, block=max(1, int(remaining * 1000)))
+            if entries:
+                added = added + entries if added is not None else None
+                changes = self._resolve_changes(ops, (last_id, added), entries)
+                yield changes
+                if changes["truncated"]:
+                    return  # the follower reloads, and follows again from there
+
+    def _collect_changes(self, page, ops): # folds a page of stream entries into {id: last op}, returns the last entry id
+        for entry_id, fields in page:
+            if fields["op"] == "reload":
+                ops[None] = "reload"  # a bulk write listed no ids
+                continue
+            for person_id in fields["ids"].split(","):
+                ops[person_id] = fields["op"]
+        return page[-1][0]
+
+    def _resolve_changes(self, ops, cursor, entries): # fetches the people written, the ones gone by now count as deleted
+        if None in ops:
+            return {"cursor": cursor, "truncated": True, "records": [], "deleted": [], "entries": entries}
+        written = [person_id for person_id, op in ops.items() if op == "put"]
+        records, stats = self.get_many(written)
+        deleted = [person_id for person_id, op in ops.items() if op == "del"]
+        deleted += [person_data["_id"] for person_data in records if len(person_data) == 1]  # written, then deleted without a log entry
+        return {"cursor": cursor, "truncated": False, "records": [person_data for person_data in records if len(person_data) > 1],
+                "deleted": deleted, "entries": entries}
+
+    def _invalidate_cached(self, person_ids): # local writes don't wait for the server's invalidation message
+        cache = self.cache
+        if cache is not None:
+            cache.invalidate(person_ids)
+
+    def _read_names(self, person_ids): # returns the indexed name and facet fields currently stored for each person (one round trip)
+        pipe = self.client.pipeline(transaction=False)
+        self._queue_read_names(pipe, person_ids)
+        return self._names(pipe.execute())
+
+    def _write_watched(self, keys, queue_reads, queue_writes): # WATCH, pipelined read, MULTI/EXEC, retried with backoff while other clients win
+        # Returns (queue_writes' result, EXEC replies), the replies None when every attempt lost to a concurrent write
+        for attempt in range(WATCH_RETRIES):
+            if attempt:
+                time.sleep(WATCH_BACKOFF * 2 ** (attempt - 1))
+            with self.client.pipeline(transaction=True) as pipe:
+                try:
+                    pipe.watch(*keys)
+                    read = self.client.pipeline(transaction=False)  # any change after WATCH, even before this read, aborts the EXEC
+                    queue_reads(read)
+                    stored = read.execute()
+                    pipe.multi()
+                    result = queue_writes(pipe, stored)
+                    return result, pipe.execute()
+                except redis.WatchError:
+                    continue  # someone wrote one of them meanwhile, read them again
+        return result, None
+
+    async def _write_watched_async(self, keys, queue_reads, queue_writes): # _write_watched on the async engine's loop
+        client = self.engine.client
+        for attempt in range(WATCH_RETRIES):
+            if attempt:
+                await asyncio.sleep(WATCH_BACKOFF * 2 ** (attempt - 1))
+            async with client.pipeline(transaction=True) as pipe:
+                try:
+                    await pipe.watch(*keys)
+                    read = client.pipeline(transaction=False)
+                    queue_reads(read)
+                    stored = await self.engine.execute(read, "PIPELINE")
+                    pipe.multi()
+                    result = queue_writes(pipe, stored)
+                    return result, await self.engine.execute(pipe, "MULTI")
+                except redis.WatchError:
+                    continue
+        return result, None
+
+    def _queue_read_names(self, pipe, person_ids):
+        for person_id in person_ids:
+            pipe.hmget(self.person_key(person_id), STORED_INDEXED_FIELDS)
+
+    def _names(self, results):
+        names = []
+        for values in results:
+            stored = {field: value for field, value in zip(STORED_INDEXED_FIELDS, values) if value is not None}
+            names.append(decode_person("", stored) if stored else {})
+        return names
+
+    def _update_name_index(self, pipe, person_id, old, new): # queues SREM/SADD for the name trigrams that changed
+        for field, prefix in self.name_indexes.items():
+            old_grams = name_grams(old.get(field) or "")
+            new_grams = name_grams(new.get(field) or "")
+            for gram in old_grams - new_grams:
+                pipe.srem(f"{prefix}:{gram}", person_id)
+            for gram in new_grams - old_grams:
+                pipe.sadd(f"{prefix}:{gram}", person_id)
+
+    def _update_range_index(self, pipe, person_id, new, fields=RANGE_INDEXES): # ZADD overwrites the old score, so no read of the old values is needed
+        for field, key in self.range_indexes.items():
+            if field not in fields:
+                continue  # a field-level write leaves the others alone
+            score = range_score(field, new.get(field))
+            if score is None:
+                pipe.zrem(key, person_id)
+            else:
+                pipe.zadd(key, {person_id: score})
+
+    def _update_facet_index(self, pipe, person_id, old, new): # moves the id between the per-value sets of a changed Department or Country
+        for field, prefix in self.facet_indexes.items():
+            old_value = (old.get(field) or "").strip()
+            new_value = (new.get(field) or "").strip()
+            if old_value == new_value:
+                continue
+            if old_value:
+                pipe.srem(f"{prefix}:{old_value}", person_id)
+            if new_value:
+                pipe.sadd(f"{prefix}:{new_value}", person_id)
+                pipe.sadd(prefix, new_value)
+
+    def migrate_records(self, batch_size=None): # rewrites every person stored in another format in the current one, yielding the number checked so far
+        batch_size = batch_size or self.batch_size
+        checked = 0
+        cursor = 0
+        while True:
+            cursor, person_ids = self.client.sscan(self.ids_key, cursor, count=batch_size)
+            for chunk in chunked(person_ids, batch_size):
+                self._migrate_chunk(chunk)
+                checked += len(chunk)
+                yield checked
+            if cursor == 0:
+                break
+
+    def _migrate_chunk(self, person_ids): # re-encodes one chunk under WATCH so a concurrent update is never overwritten with stale values
+        keys = [self.person_key(person_id) for person_id in person_ids]
+
+        def queue_writes(pipe, stored):
+            for person_id, old_stored in zip(person_ids, stored):
+                if old_stored and stored_format(old_stored) != self.record_format:
+                    self._queue_store(pipe, person_id, encode_person(decode_person(person_id, old_stored), self.record_format), False)
+        self._write_watched(keys, lambda read: [read.hgetall(key) for key in keys], queue_writes)  # a chunk other clients keep writing stays as it is, reads accept every format
+
+    def random_ids(self, count): # up to count distinct stored ids picked at random
+        return self.client.srandmember(self.ids_key, count)
+
+    def record_bytes(self, sample_size=RECORD_BYTES_SAMPLE): # average server memory per person hash over a random sample, None when empty
+        keys = [self.person_key(person_id) for person_id in self.random_ids(sample_size)]
+        if not keys:
+            return None
+        try:
+            self.client.memory_usage(keys[0], samples=0)  # one probe, a pipeline of failing commands is wasted work
+            estimated = False
+        except (redis.ConnectionError, redis.TimeoutError):
+            raise
+        except redis.RedisError:
+            estimated = True  # no MEMORY USAGE (older or stand-in servers, or a cluster client that can't route it): count the field and value bytes instead
+
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            if estimated:
+                pipe.hgetall(key)
+            else:
+                pipe.memory_usage(key, samples=0)
+        sizes = pipe.execute()
+        if estimated:
+            sizes = [sum(len(field.encode()) + len(value.encode()) for field, value in stored.items()) for stored in sizes]
+        sizes = [size for size in sizes if size]
+        if not sizes:
+            return None
+        return {"bytes_per_record": round(sum(sizes) / len(sizes), 1), "sample": len(sizes), "estimated": estimated}
+
+    def search_ids(self, firstname, lastname, ranges=None, facets=None): # ids whose names contain every trigram of the search text, with every facet and scores in range, None when the index can't answer
+        keys = []
+        for field, text in (("First Name", firstname), ("Last Name", lastname)):
+            keys.extend(f"{self.name_indexes[field]}:{gram}" for gram in name_grams(text))
+        keys.extend(f"{self.facet_indexes[field]}:{value}" for field, value in (facets or {}).items())  # intersected on the server with the trigrams
+        ranges = ranges or {}
+        if not keys and not ranges:
+            return None  # search text too short for trigrams
+
+        pipe = self.client.pipeline(transaction=False)
+        pipe.exists(self.ready_key)
+        if keys:
+            pipe.execute_command("SINTER", *keys)  # a cluster pipeline refuses sinter() even when the keys share a slot
+        for field, (low, high) in ranges.items():
+            pipe.zrangebyscore(self.range_indexes[field], "-inf" if low is None else low, "+inf" if high is None else high)
+        ready, *id_sets = pipe.execute()
+        return set(id_sets[0]).intersection(*id_sets[1:]) if ready else None
+
+    def search(self, firstname, lastname, batch_size=None, ranges=None, facets=None): # yields (matching records, running stats) one page at a time, from the indexes when they can answer
+        batch_size = batch_size or self.batch_size
+        ranges = ranges or {}  # field -> (low, high) range_score bounds
+        facets = facets or {}  # field -> exact Department/Country value
+        stats = {"records": 0, "scanned": 0, "total": 0, "round_trips": 1, "seconds": 0.0, "indexed": True}
+        start = time.perf_counter()
+        person_ids = self.search_ids(firstname, lastname, ranges, facets)
+
+        def matches(person_data):
+            return search_matches(person_data, firstname, lastname, ranges, facets)
+
+        if person_ids is None:
+            # Search text shorter than a trigram or index not built yet: search through all records
+            stats.update(total=self.count(), indexed=False)
+            round_trips = stats["round_trips"] + 1  # SCARD
+            if self.scan_filter and (firstname or lastname or facets) and (firstname + lastname).isascii():  # Lua lowercases ASCII only
+                scanned = yield from self._search_scan(firstname, lastname, facets, batch_size, matches, stats, round_trips, start)
+                if scanned is not None:
+                    return
+            for records, scan_stats in self.iter_all(batch_size):
+                records = [person_data for person_data in records if matches(person_data)]
+                stats["records"] += len(records)
+                stats.update(scanned=scan_stats["records"], round_trips=round_trips + scan_stats["round_trips"], seconds=time.perf_counter() - start)
+                yield records, stats
+            return
+
+        person_ids = list(person_ids)
+        stats["total"] = len(person_ids)
+        if not person_ids:
+            yield [], stats
+        for records, round_trips in self._fetch_chunks(chunked(person_ids, batch_size)):
+            stats["scanned"] += len(records)
+            records = [person_data for person_data in records if matches(person_data)]  # trigrams can match out of order
+            stats["records"] += len(records)
+            stats["round_trips"] += round_trips
+            stats["seconds"] = time.perf_counter() - start
+            yield records, stats
+
+    def _search_scan(self, firstname, lastname, facets, batch_size, matches, stats, round_trips, start): # the SSCAN walk of search with the filtering done in Lua
+        # Returns the ids scanned, or None without yielding anything when the server won't run the script
+        script = self.client.register_script(SEARCH_SCAN_SCRIPT)
+        args = [firstname.lower(), lastname.lower(), facets.get("Department", ""), facets.get("Country", ""), self.key_prefix]
+        seen = set()  # SSCAN may return an id more than once if the set is rehashed mid-scan
+        scanned = 0
+        cursor = "0"
+        while True:
+            try:
+                cursor, count, *found = script(keys=[self.ids_key], args=[cursor, batch_size] + args)  # one page per call, so the server never blocks for long
+            except redis.ResponseError:
+                if scanned:
+                    raise
+                self.scan_filter = False  # scripting disabled or EVAL not allowed for this user, filter on the client
+                return None
+            scanned += count
+            round_trips += 1
+            records = []
+            for person_id, flat in zip(found[0::2], found[1::2]):
+                if person_id not in seen:
+                    seen.add(person_id)
+                    records.append(decode_person(person_id, dict(zip(flat[0::2], flat[1::2]))))
+            records = [person_data for person_data in records if matches(person_data)]  # ranges, and the exact name match
+            stats["records"] += len(records)
+            stats.update(scanned=scanned, round_trips=round_trips, seconds=time.perf_counter() - start)
+            yield records, stats
+            if str(cursor) == "0":
+                return scanned
+
+    def facet_counts(self, selected=None): # {field: {value: count}} for every Department and Country value, narrowed by the other selected facets, None until the index is built
+        selected = selected or {}
+        pipe = self.client.pipeline(transaction=False)
+        pipe.exists(self.ready_key)
+        for prefix in self.facet_indexes.values():
+            pipe.smembers(prefix)
+        ready, *values = pipe.execute()
+        if not ready:
+            return None
+
+        queries = []  # (field, value, keys to intersect)
+        for (field, prefix), field_values in zip(self.facet_indexes.items(), values):
+            others = [f"{self.facet_indexes[other]}:{value}" for other, value in selected.items() if other != field]
+            queries.extend((field, value, [f"{prefix}:{value}"] + others) for value in field_values)
+        pipe = self.client.pipeline(transaction=False)
+        for field, value, keys in queries:
+            pipe.scard(keys[0])  # a value nobody has any more is left out, and pruned from the value list
+            if len(keys) == 1:
+                continue
+            if self.sintercard:
+                pipe.sintercard(len(keys), keys)
+            else:
+                pipe.execute_command("SINTER", *keys)
+        try:
+            results = pipe.execute()
+        except redis.ResponseError:
+            if not self.sintercard:
+                raise
+            self.sintercard = False  # before Redis 7, count the intersections on the client
+            return self.facet_counts(selected)
+
+        counts = {field: {} for field in self.facet_indexes}
+        empty = {field: [] for field in self.facet_indexes}
+        results = iter(results)
+        for field, value, keys in queries:
+            count = next(results)
+            if count == 0:
+                empty[field].append(value)
+                continue
+            if len(keys) > 1:
+                result = next(results)
+                count = result if isinstance(result, int) else len(result)
+            counts[field][value] = count
+        self._prune_facet_values(empty)
+        return counts
+
+    def _prune_facet_values(self, empty): # removes {field: [values]} from the value lists if their id sets are still empty
+        script = self.client.register_script(PRUNE_FACET_VALUES_SCRIPT)
+        for field, values in empty.items():
+            if values:
+                try:
+                    script(keys=[self.facet_indexes[field]], args=values)  # the id sets share the list's hash tag in a cluster shard
+                except redis.ResponseError:
+                    pass  # scripting disabled: the values stay listed, facet_counts leaves them out anyway
+
+    def rebuild_search_index(self): # recreates the name, range and facet indexes and fills in the order index from every stored person, yielding the number indexed so far
+        self.client.delete(self.ready_key)
+        for prefix in list(self.name_indexes.values()) + list(self.facet_indexes.values()):
+            keys = []
+            for key in self.client.scan_iter(match=f"{prefix}:*", count=self.batch_size):
+                keys.append(key)
+                if len(keys) >= self.batch_size:
+                    self.client.unlink(*keys)
+                    keys = []
+            if keys:
+                self.client.unlink(*keys)
+        self.client.unlink(*self.range_indexes.values(), *self.facet_indexes.values())
+
+        for records, stats in self.iter_all():
+            pipe = self.client.pipeline(transaction=False)
+            for data in records:
+                self._update_name_index(pipe, data["_id"], {}, data)
+                self._update_range_index(pipe, data["_id"], data)
+                self._update_facet_index(pipe, data["_id"], {}, data)
+            if records:
+                pipe.zadd(self.order_key, {data["_id"]: 0 for data in records}, nx=True)  # people stored before the index sort first
+            pipe.execute()
+            yield stats["records"]
+
+        self._prune_order_index()
+
+        self.client.set(self.ready_key, 1)
+
+    def _prune_order_index(self): # drops order index entries whose person is gone, e.g. deleted by an older version
+        for chunk in chunked((person_id for person_id, score in self.client.zscan_iter(self.order_key, count=self.batch_size)), self.batch_size):
+            pipe = self.client.pipeline(transaction=False)
+            for person_id in chunk:
+                pipe.sismember(self.ids_key, person_id)
+            stale = [person_id for person_id, member in zip(chunk, pipe.execute()) if not member]
+            if stale:
+                self.client.zrem(self.order_key, *stale)
+
+    def ordered_count(self): # number of people in the order index, None until rebuild_search_index has filled it in
+        pipe = self.client.pipeline(transaction=False)
+        pipe.exists(self.ready_key)
+        pipe.zcard(self.order_key)
+        ready, total = pipe.execute()
+        return total if ready else None
+
+    def ordered_page(self, start, count): # the people at positions start..start+count-1 of the order index, oldest first
+        person_ids = self.client.zrange(self.order_key, start, start + count - 1)
+        records, stats = self.get_many(person_ids)
+        return records
+
+    def iter_all(self, batch_size=None, dedupe=True): # walks person_ids with SSCAN, yielding (records, running stats) one batch at a time
+        batch_size = batch_size or self.batch_size
+        stats = {"records": 0, "round_trips": 0, "seconds": 0.0}
+        start = time.perf_counter()
+
+        # With the async engine the next SSCAN runs while earlier batches are still being fetched
+        for records, round_trips in self._fetch_chunks(self._scan_chunks(batch_size, dedupe, stats)):
+            stats["records"] += len(records)
+            stats["round_trips"] += round_trips
+            stats["seconds"] = time.perf_counter() - start
+            yield records, stats
+
+        if not stats["records"]:
+            stats["seconds"] = time.perf_counter() - start
+            yield [], stats
+
+    def _scan_chunks(self, batch_size, dedupe, stats): # yields the ids from each SSCAN page in chunks of at most batch_size
+        seen = set()  # SSCAN may return an id more than once if the set is rehashed mid-scan
+        cursor = 0
+        while True:
+            cursor, person_ids = self.client.sscan(self.ids_key, cursor, count=batch_size)
+            stats["round_trips"] += 1
+            if dedupe:
+                person_ids = [person_id for person_id in person_ids if person_id not in seen]
+                seen.update(person_ids)
+            yield from chunked(person_ids, batch_size)
+            if cursor == 0:
+                break
@@ -0,0 +1,36 @@
+from PySide6.QtCore import QObject, QRunnable, Signal, Slot
+
+class WorkerSignals(QObject): # signals a Worker uses to hand results back to the GUI thread
+    progress = Signal(object)  # emitted by the task while it runs (pages of records, row counts, ...)
+    result = Signal(object)  # return value of the task
+    error = Signal(object)  # exception raised by the task
+    finished = Signal()  # always emitted last, after result or error
+
+class Worker(QRunnable): # runs fn(worker, *args, **kwargs) on a QThreadPool thread
+    def __init__(self, fn, *args, error_message="Operation failed", **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.error_message = error_message  # prefix used when the GUI reports an error from this task
+        self.signals = WorkerSignals()
+        self.cancelled = False
+        self.error = None  # exception raised by the task, if any
+
+    def cancel(self): # asks the task to stop at its next checkpoint
+        self.cancelled = True
+
+    def report_progress(self, value): # called by the task from the worker thread
+        self.signals.progress.emit(value)
+
+    @Slot()
+    def run(self):
+        try:
+            result = self.fn(self, *self.args, **self.kwargs)
+        except Exception as e:
+            self.error = e
+            self.signals.error.emit(e)
+        else:
+            self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()